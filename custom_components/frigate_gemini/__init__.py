@@ -3,14 +3,19 @@ from __future__ import annotations
 
 import logging
 import asyncio
+import time
 import aiohttp
 from typing import Any
 
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_API_KEY, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_API_KEY, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.start import async_at_started
 
 from .const import (
     DOMAIN,
@@ -18,20 +23,159 @@ from .const import (
     CONF_FRIGATE_URL,
     CONF_CAMERAS,
     CONF_PROMPT,
+    CONF_EXTRA_API_KEYS,
+    CONF_MODEL,
+    CONF_LABEL_MODELS,
+    CONF_FALLBACK_MODEL,
+    CONF_LATENCY_BUDGET,
+    CONF_STRUCTURED_OUTPUT,
+    CONF_MAX_OUTPUT_TOKENS,
+    CONF_DRAIN_TIMEOUT,
+    CONF_PRESCREEN,
+    CONF_PRESCREEN_ACTION,
+    CONF_PRESCREEN_THRESHOLD,
+    CONF_CORRELATION_GROUP,
+    CONF_CORRELATION_WINDOW,
+    CONF_DEDUP,
+    CONF_DEDUP_ACTION,
+    CONF_DEDUP_DISTANCE,
+    CONF_RECORDING_WINDOW,
+    CONF_CLIP_PADDING,
+    CONF_MAX_CLIP_DURATION,
+    CONF_CAMERA_PRIORITY,
+    CONF_LABEL_PRIORITIES,
+    CONF_ANALYSIS_ATTRIBUTE,
+    CONF_VIDEO_FPS,
+    CONF_LABEL_VIDEO_FPS,
+    CONF_VIDEO_START_OFFSET,
+    CONF_VIDEO_END_OFFSET,
+    CONF_SPOOL_BUDGET,
+    CONF_MAX_PARALLEL,
+    CONF_SPOOL_DIR,
+    CONF_TRACE_FILE,
+    CONF_LOOP_WATCHDOG,
+    CONF_WORKER_SOCKET,
+    CONF_SPAWN_WORKER,
     DEFAULT_MQTT_TOPIC,
     DEFAULT_PROMPT,
+    DEFAULT_LATENCY_BUDGET,
+    DEFAULT_MAX_OUTPUT_TOKENS,
+    DEFAULT_DRAIN_TIMEOUT,
+    DEFAULT_PRESCREEN_THRESHOLD,
+    DEFAULT_CORRELATION_WINDOW,
+    DEFAULT_DEDUP_DISTANCE,
+    DEFAULT_CLIP_PADDING,
+    DEFAULT_MAX_CLIP_DURATION,
+    DEFAULT_CAMERA_PRIORITY,
+    DEFAULT_SPOOL_BUDGET,
+    DEFAULT_MAX_PARALLEL,
+    MAX_PARALLEL_LIMIT,
+    MODEL_ID,
+    DATA_PIPELINE,
+    DATA_SPOOL,
+    DATA_PRESCREENER,
+    DATA_CORRELATOR,
+    DATA_TRACER,
+    DATA_WATCHDOG,
+    DATA_ANALYSES,
+    DATA_WORKER,
+    DEFAULT_ANALYSIS_ATTRIBUTE,
+    PRESCREEN_SKIP,
+    DEDUP_REUSE,
 )
+from .analysis_store import AnalysisStore
 from .mqtt_handler import MQTTHandler
 from .gemini_handler import GeminiHandler
+from .backfill import BackfillManager
+from .correlation import EventCorrelator
+from .dedup import DuplicateIndex
+from .pipeline import AnalysisPipeline, AnalysisProgress
+from .prescreen import PreScreener
+from .services import async_setup_services
+from .spool import ClipSpool
+from .tracing import LoopWatchdog, TraceRecorder
+from .util import parse_api_keys, parse_label_map, parse_label_weights
+from .worker_client import RemoteGeminiHandler, WorkerClient
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.SENSOR, Platform.SWITCH]
 
+# Optional YAML settings shared by all cameras
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(CONF_SPOOL_DIR): cv.string,
+                vol.Optional(
+                    CONF_SPOOL_BUDGET, default=DEFAULT_SPOOL_BUDGET
+                ): vol.All(vol.Coerce(int), vol.Range(min=16)),
+                # Clips analysed at the same time across all cameras
+                vol.Optional(CONF_MAX_PARALLEL, default=DEFAULT_MAX_PARALLEL): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=MAX_PARALLEL_LIMIT)
+                ),
+                vol.Optional(CONF_TRACE_FILE): cv.string,
+                # Seconds; reports FriGem code blocking the event loop longer
+                vol.Optional(CONF_LOOP_WATCHDOG): vol.All(
+                    vol.Coerce(float), vol.Range(min=0.05)
+                ),
+                # Unix socket of an out-of-process analysis worker
+                vol.Optional(CONF_WORKER_SOCKET): cv.string,
+                vol.Optional(CONF_SPAWN_WORKER, default=True): cv.boolean,
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
 
 async def async_setup(hass: HomeAssistant, config: dict[str, Any]) -> bool:
     """Set up the FriGem component."""
+    conf = config.get(DOMAIN, {})
     hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][DATA_PIPELINE] = AnalysisPipeline(
+        conf.get(CONF_MAX_PARALLEL, DEFAULT_MAX_PARALLEL)
+    )
+    hass.data[DOMAIN][DATA_CORRELATOR] = EventCorrelator(hass)
+    hass.data[DOMAIN][DATA_TRACER] = TraceRecorder(hass, conf.get(CONF_TRACE_FILE))
+
+    spool = ClipSpool(
+        hass,
+        conf.get(CONF_SPOOL_DIR),
+        conf.get(CONF_SPOOL_BUDGET, DEFAULT_SPOOL_BUDGET) * 1024 * 1024,
+    )
+    await spool.async_setup()
+    hass.data[DOMAIN][DATA_SPOOL] = spool
+
+    analyses = AnalysisStore(hass)
+    await analyses.async_load()
+    hass.data[DOMAIN][DATA_ANALYSES] = analyses
+
+    prescreener = PreScreener()
+    hass.data[DOMAIN][DATA_PRESCREENER] = prescreener
+
+    watchdog = None
+    if threshold := conf.get(CONF_LOOP_WATCHDOG):
+        watchdog = LoopWatchdog(hass, threshold)
+        watchdog.async_start()
+        hass.data[DOMAIN][DATA_WATCHDOG] = watchdog
+
+    worker = None
+    if socket_path := conf.get(CONF_WORKER_SOCKET):
+        worker = WorkerClient(hass, socket_path, conf.get(CONF_SPAWN_WORKER, True))
+        worker.async_start()
+        hass.data[DOMAIN][DATA_WORKER] = worker
+
+    async def _shutdown(_event: Event) -> None:
+        prescreener.shutdown()
+        if watchdog:
+            watchdog.async_stop()
+        if worker:
+            await worker.async_stop()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _shutdown)
+
+    await async_setup_services(hass)
     return True
 
 
@@ -48,6 +192,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         # Initialize data store
         hass.data.setdefault(DOMAIN, {})
+        pipeline = hass.data[DOMAIN][DATA_PIPELINE]
         
         # Set unique ID if not set
         if not entry.unique_id:
@@ -56,10 +201,47 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             )
 
         # Initialize handlers
+        timings: dict[str, float] = {}
+        setup_start = step_start = time.perf_counter()
+
+        def _record(step: str) -> None:
+            nonlocal step_start
+            now = time.perf_counter()
+            timings[step] = round(now - step_start, 3)
+            step_start = now
+
         try:
-            # Initialize Gemini handler first
-            gemini_handler = GeminiHandler(entry.data[CONF_API_KEY])
+            # Initialize Gemini handler first; the SDK itself loads lazily
+            gemini_settings = dict(
+                api_keys=parse_api_keys(
+                    entry.data[CONF_API_KEY], entry.data.get(CONF_EXTRA_API_KEYS)
+                ),
+                model=entry.data.get(CONF_MODEL) or MODEL_ID,
+                label_models=parse_label_map(entry.data.get(CONF_LABEL_MODELS)),
+                fallback_model=entry.data.get(CONF_FALLBACK_MODEL) or None,
+                latency_budget=entry.data.get(
+                    CONF_LATENCY_BUDGET, DEFAULT_LATENCY_BUDGET
+                ),
+                structured_output=entry.data.get(CONF_STRUCTURED_OUTPUT, False),
+                max_output_tokens=entry.data.get(
+                    CONF_MAX_OUTPUT_TOKENS, DEFAULT_MAX_OUTPUT_TOKENS
+                ),
+                video_fps=entry.data.get(CONF_VIDEO_FPS, 0),
+                label_video_fps=parse_label_weights(
+                    entry.data.get(CONF_LABEL_VIDEO_FPS)
+                ),
+                video_start_offset=entry.data.get(CONF_VIDEO_START_OFFSET, 0),
+                video_end_offset=entry.data.get(CONF_VIDEO_END_OFFSET, 0),
+            )
+            if worker := hass.data[DOMAIN].get(DATA_WORKER):
+                # Upload and generation run in the worker process
+                gemini_handler = RemoteGeminiHandler(
+                    worker, entry.entry_id, gemini_settings
+                )
+            else:
+                gemini_handler = GeminiHandler(**gemini_settings)
             _LOGGER.debug("Gemini handler initialized successfully")
+            _record("gemini_handler")
 
             # Initialize MQTT handler
             mqtt_handler = MQTTHandler(
@@ -69,25 +251,91 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 entry.data[CONF_CAMERAS],
                 entry.data.get(CONF_PROMPT, DEFAULT_PROMPT),
                 gemini_handler,
+                pipeline,
+                hass.data[DOMAIN][DATA_SPOOL],
+                prescreener=hass.data[DOMAIN][DATA_PRESCREENER],
+                prescreen_threshold=(
+                    entry.data.get(CONF_PRESCREEN_THRESHOLD, DEFAULT_PRESCREEN_THRESHOLD)
+                    if entry.data.get(CONF_PRESCREEN)
+                    else None
+                ),
+                prescreen_action=entry.data.get(CONF_PRESCREEN_ACTION, PRESCREEN_SKIP),
+                correlator=hass.data[DOMAIN][DATA_CORRELATOR],
+                correlation_group=entry.data.get(CONF_CORRELATION_GROUP) or None,
+                correlation_window=entry.data.get(
+                    CONF_CORRELATION_WINDOW, DEFAULT_CORRELATION_WINDOW
+                ),
+                dedup=(
+                    DuplicateIndex(
+                        entry.data.get(CONF_DEDUP_DISTANCE, DEFAULT_DEDUP_DISTANCE)
+                    )
+                    if entry.data.get(CONF_DEDUP)
+                    else None
+                ),
+                dedup_action=entry.data.get(CONF_DEDUP_ACTION, DEDUP_REUSE),
+                tracer=hass.data[DOMAIN][DATA_TRACER],
+                recording_window=entry.data.get(CONF_RECORDING_WINDOW, False),
+                clip_padding=entry.data.get(CONF_CLIP_PADDING, DEFAULT_CLIP_PADDING),
+                max_clip_duration=entry.data.get(
+                    CONF_MAX_CLIP_DURATION, DEFAULT_MAX_CLIP_DURATION
+                ),
+                camera_priority=entry.data.get(
+                    CONF_CAMERA_PRIORITY, DEFAULT_CAMERA_PRIORITY
+                ),
+                label_priorities=parse_label_weights(
+                    entry.data.get(CONF_LABEL_PRIORITIES)
+                ),
+                analysis_store=hass.data[DOMAIN][DATA_ANALYSES],
+                analysis_attribute=entry.data.get(
+                    CONF_ANALYSIS_ATTRIBUTE, DEFAULT_ANALYSIS_ATTRIBUTE
+                ),
             )
             await mqtt_handler.async_setup()
             _LOGGER.debug("MQTT handler initialized successfully")
+            _record("mqtt_subscribe")
+
+            # Initialize backfill manager, resuming any interrupted backfill
+            backfill = BackfillManager(hass, entry, mqtt_handler, pipeline)
+            await backfill.async_setup()
+            await mqtt_handler.async_resume(backfill.pop_pending())
+            _record("backfill_restore")
 
             # Store handlers
             hass.data[DOMAIN][entry.entry_id] = {
                 "mqtt_handler": mqtt_handler,
                 "gemini_handler": gemini_handler,
+                "progress": AnalysisProgress(hass, entry.entry_id),
+                "backfill": backfill,
+                "startup_timings": timings,
             }
 
             # Set up platforms
             await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
             _LOGGER.debug("Platforms setup completed")
+            _record("platforms")
+            timings["total"] = round(time.perf_counter() - setup_start, 3)
+            _LOGGER.debug("FriGem setup timings: %s", timings)
+
+            # Load the Gemini SDK in the executor once Home Assistant has started,
+            # so the first event doesn't pay for it and boot isn't slowed down
+            async def _async_prepare_gemini(_hass: HomeAssistant) -> None:
+                try:
+                    await gemini_handler.async_prepare()
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.warning("Could not preload the Gemini SDK: %s", str(err))
+
+            entry.async_on_unload(async_at_started(hass, _async_prepare_gemini))
+
+            # Reload when the options flow updates the entry
+            entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
             return True
 
         except Exception as err:
             _LOGGER.error("Error setting up FriGem: %s", str(err))
             # Clean up any partially initialized handlers
+            if "backfill" in locals():
+                await backfill.async_unload()
             if "mqtt_handler" in locals():
                 await mqtt_handler.async_unload()
             if "gemini_handler" in locals():
@@ -99,24 +347,37 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         raise ConfigEntryNotReady(f"Setup failed: {str(err)}") from err
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its settings changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading FriGem integration")
 
-    # Unload platforms first
+    data = hass.data[DOMAIN].get(entry.entry_id, {})
+
+    # Stop intake and drain in-flight jobs first, so no result is written
+    # after the entities are gone; unfinished jobs are persisted for later
+    unfinished = []
+    if mqtt_handler := data.get("mqtt_handler"):
+        unfinished = await mqtt_handler.async_unload(
+            entry.data.get(CONF_DRAIN_TIMEOUT, DEFAULT_DRAIN_TIMEOUT)
+        )
+        _LOGGER.debug("MQTT handler unloaded (%d jobs unfinished)", len(unfinished))
+
+    if backfill := data.get("backfill"):
+        await backfill.async_unload(unfinished)
+        _LOGGER.debug("Backfill stopped")
+
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    
+
     if unload_ok:
-        # Get the data store
-        data = hass.data[DOMAIN].pop(entry.entry_id)
-        
-        # Clean up handlers
-        if mqtt_handler := data.get("mqtt_handler"):
-            await mqtt_handler.async_unload()
-            _LOGGER.debug("MQTT handler unloaded")
-            
-        if gemini_handler := data.get("gemini_handler"):
-            await gemini_handler.close()
-            _LOGGER.debug("Gemini handler closed")
+        hass.data[DOMAIN].pop(entry.entry_id)
+
+    if gemini_handler := data.get("gemini_handler"):
+        await gemini_handler.close()
+        _LOGGER.debug("Gemini handler closed")
 
     return unload_ok
@@ -0,0 +1,114 @@
+"""Bounded store of full analysis texts, kept outside the state machine."""
+from __future__ import annotations
+
+import logging
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    ANALYSIS_STORE_LIMIT,
+    ANALYSIS_SUMMARY_LENGTH,
+    STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SAVE_DELAY = 30  # seconds
+
+
+def summarize(text: str, length: int = ANALYSIS_SUMMARY_LENGTH) -> str:
+    """Return the text cut to a length that is cheap to keep in history."""
+    if len(text) <= length:
+        return text
+    return text[: length - 1].rstrip() + "…"
+
+
+class AnalysisStore:
+    """Keep the full text of recent analyses under a reference ID.
+
+    Sensors carry the ID instead of (or next to) the text, so the recorder
+    doesn't persist a new large attributes row for every result. The oldest
+    analyses are dropped beyond ANALYSIS_STORE_LIMIT; the rest survive a
+    restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, limit: int = ANALYSIS_STORE_LIMIT) -> None:
+        """Initialize the store."""
+        self.hass = hass
+        self.limit = limit
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.analyses")
+        self._analyses: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    async def async_load(self) -> None:
+        """Load the persisted analyses."""
+        if data := await self._store.async_load():
+            for record in data.get("analyses", [])[-self.limit :]:
+                self._analyses[record["analysis_id"]] = record
+        _LOGGER.debug("[STORE] Loaded %d analyses", len(self._analyses))
+
+    @callback
+    def async_add(
+        self,
+        camera: str | list[str],
+        label: str,
+        event_id: str | list[str] | None,
+        text: str,
+        model: str,
+        fields: dict[str, Any] | None = None,
+    ) -> str:
+        """Store an analysis and return its reference ID."""
+        analysis_id = uuid.uuid4().hex[:16]
+        self._analyses[analysis_id] = {
+            "analysis_id": analysis_id,
+            "camera": camera,
+            "label": label,
+            "event_id": event_id,
+            "analysis": text,
+            "model": model,
+            "fields": fields or {},
+            "time": dt_util.now().isoformat(),
+        }
+        while len(self._analyses) > self.limit:
+            self._analyses.popitem(last=False)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return analysis_id
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the analyses to persist."""
+        return {"analyses": list(self._analyses.values())}
+
+    def get(self, analysis_id: str) -> dict[str, Any] | None:
+        """Return a stored analysis by reference ID."""
+        return self._analyses.get(analysis_id)
+
+    def find(
+        self, camera: str | None = None, event_id: str | None = None
+    ) -> dict[str, Any] | None:
+        """Return the newest analysis of a camera and/or Frigate event."""
+        for record in reversed(self._analyses.values()):
+            if camera is not None and not _matches(record["camera"], camera):
+                continue
+            if event_id is not None and not _matches(record["event_id"], event_id):
+                continue
+            return record
+        return None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the fill level of the store."""
+        return {
+            "stored": len(self._analyses),
+            "limit": self.limit,
+            "characters": sum(len(record["analysis"]) for record in self._analyses.values()),
+        }
+
+
+def _matches(value: str | list[str] | None, wanted: str) -> bool:
+    """Return True if a single value or a group's list contains wanted."""
+    return wanted in value if isinstance(value, list) else value == wanted
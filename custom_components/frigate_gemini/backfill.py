@@ -0,0 +1,290 @@
+"""Historical backfill of Frigate events."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    BACKFILL_HISTORY_SIZE,
+    BACKFILL_PAGE_SIZE,
+    EVENT_ANALYSIS_COMPLETE,
+    EVENT_BACKFILL_ANALYSIS,
+    STORAGE_VERSION,
+)
+from .mqtt_handler import MQTTHandler
+from .pipeline import AnalysisJob, AnalysisPipeline
+
+_LOGGER = logging.getLogger(__name__)
+
+SAVE_DELAY = 10  # seconds
+
+
+class BackfillManager:
+    """Feed historical Frigate events into the analysis pipeline.
+
+    The running job and the IDs of analysed events are persisted, so a
+    restart resumes from the last processed event instead of starting over.
+    Live jobs cut short by an unload are persisted here as well.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        mqtt_handler: MQTTHandler,
+        pipeline: AnalysisPipeline,
+    ) -> None:
+        """Initialize the backfill manager."""
+        self.hass = hass
+        self.entry = entry
+        self.mqtt_handler = mqtt_handler
+        self.pipeline = pipeline
+        self._store = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.backfill.{entry.entry_id}"
+        )
+        self._analyzed: deque[str] = deque(maxlen=BACKFILL_HISTORY_SIZE)
+        self._analyzed_set: set[str] = set()
+        self._job: dict[str, Any] | None = None
+        self._pending: list[dict[str, Any]] = []
+        self._task: asyncio.Task | None = None
+        self._unsub_analysis = None
+
+    @property
+    def running(self) -> bool:
+        """Return True while a backfill is in progress."""
+        return self._task is not None and not self._task.done()
+
+    async def async_setup(self) -> None:
+        """Load persisted state and resume an interrupted backfill."""
+        if data := await self._store.async_load():
+            for event_id in data.get("analyzed", []):
+                self._remember(event_id)
+            self._job = data.get("job")
+            self._pending = data.get("pending", [])
+
+        self._unsub_analysis = self.hass.bus.async_listen(
+            EVENT_ANALYSIS_COMPLETE, self._async_live_analysis
+        )
+
+        if self._job and not self.pipeline.background_slots:
+            _LOGGER.warning(
+                "[BACKFILL] Not resuming backfill for camera %s: max_parallel "
+                "must be at least 2 so one slot stays free for live events",
+                self._job["camera"],
+            )
+        elif self._job:
+            _LOGGER.info(
+                "[BACKFILL] Resuming backfill for camera %s", self._job["camera"]
+            )
+            self._start_task()
+
+    def pop_pending(self) -> list[AnalysisJob]:
+        """Return and forget live jobs left unfinished by the last unload."""
+        jobs = [AnalysisJob(**job) for job in self._pending]
+        if self._pending:
+            self._pending = []
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return jobs
+
+    async def async_unload(self, unfinished: list[AnalysisJob] | None = None) -> None:
+        """Stop the backfill and persist the cursor and unfinished live jobs."""
+        self._pending.extend(asdict(job) for job in unfinished or [])
+        if self._unsub_analysis:
+            self._unsub_analysis()
+            self._unsub_analysis = None
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self._store.async_save(self._data_to_save())
+
+    async def async_start(
+        self,
+        camera: str,
+        start_time: float,
+        end_time: float,
+        labels: list[str],
+        rate: int,
+    ) -> None:
+        """Start a new backfill, replacing any running one."""
+        await self.async_cancel()
+        self._job = {
+            "camera": camera,
+            "after": start_time,
+            "before": end_time,  # Cursor: moves back as events are processed
+            "labels": labels,
+            "rate": rate,
+        }
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        _LOGGER.info(
+            "[BACKFILL] Starting backfill for camera %s from %s to %s",
+            camera,
+            dt_util.utc_from_timestamp(start_time).isoformat(),
+            dt_util.utc_from_timestamp(end_time).isoformat(),
+        )
+        self._start_task()
+
+    async def async_cancel(self) -> None:
+        """Cancel the running backfill and forget its cursor."""
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self._job:
+            _LOGGER.info("[BACKFILL] Cancelled backfill for camera %s", self._job["camera"])
+            self._job = None
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _start_task(self) -> None:
+        """Run the backfill loop as a background task of the entry."""
+        self._task = self.entry.async_create_background_task(
+            self.hass, self._async_run(), f"{DOMAIN}_backfill_{self.entry.entry_id}"
+        )
+
+    def _remember(self, event_id: str) -> None:
+        """Record an analysed event, dropping the oldest beyond the limit."""
+        if event_id in self._analyzed_set:
+            return
+        if len(self._analyzed) == self._analyzed.maxlen:
+            self._analyzed_set.discard(self._analyzed[0])
+        self._analyzed.append(event_id)
+        self._analyzed_set.add(event_id)
+
+    @callback
+    def _async_live_analysis(self, event: Event) -> None:
+        """Remember events analysed by the live pipeline."""
+        # Group analyses list every camera and event they cover
+        cameras = event.data.get("cameras") or [event.data.get("camera")]
+        event_ids = event.data.get("event_ids") or [event.data.get("event_id")]
+        for camera, event_id in zip(cameras, event_ids):
+            if camera in self.mqtt_handler.cameras and event_id:
+                self._remember(event_id)
+                self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {
+            "analyzed": list(self._analyzed),
+            "job": self._job,
+            "pending": self._pending,
+        }
+
+    async def _async_run(self) -> None:
+        """Page through Frigate events from newest to oldest."""
+        job = self._job
+        interval = 60 / job["rate"]
+        last_start = 0.0
+
+        while True:
+            params = {
+                "camera": job["camera"],
+                "after": job["after"],
+                "before": job["before"],
+                "has_clip": 1,
+                "limit": BACKFILL_PAGE_SIZE,
+            }
+            if job["labels"]:
+                params["labels"] = ",".join(job["labels"])
+
+            events = await self.mqtt_handler.async_list_events(params)
+            if events is None:
+                _LOGGER.warning("[BACKFILL] Frigate unavailable, retrying in 60s")
+                await asyncio.sleep(60)
+                continue
+            if not events:
+                break
+
+            for event in events:
+                event_id = event["id"]
+                if event_id not in self._analyzed_set:
+                    # Throttle to the configured rate
+                    if (wait := last_start + interval - time.monotonic()) > 0:
+                        await asyncio.sleep(wait)
+                    last_start = time.monotonic()
+                    await self._async_analyze(event)
+
+                job["before"] = event["start_time"]
+                self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+            if len(events) < BACKFILL_PAGE_SIZE:
+                break
+
+        _LOGGER.info("[BACKFILL] Backfill complete for camera %s", job["camera"])
+        self._job = None
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def _async_analyze(self, event: dict[str, Any]) -> None:
+        """Analyse one historical event at background priority."""
+        confidence = event.get("top_score") or event.get("data", {}).get("top_score") or 0.0
+        job = AnalysisJob(
+            camera=event["camera"],
+            label=event["label"],
+            event_id=event["id"],
+            confidence=confidence,
+            start_time=event.get("start_time"),
+            end_time=event.get("end_time"),
+        )
+        job.priority = self.mqtt_handler.job_priority(job)
+        try:
+            result = await self.pipeline.async_run(
+                job, self.mqtt_handler.async_run_job, background=True
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.error(
+                "[BACKFILL] Error analyzing event %s: %s", event["id"], str(err)
+            )
+            return
+
+        self._remember(event["id"])
+        if result.skipped:
+            return
+
+        detection_time = dt_util.as_local(
+            dt_util.utc_from_timestamp(event.get("end_time") or event["start_time"])
+        )
+        analysis_id = None
+        if store := self.mqtt_handler.analysis_store:
+            analysis_id = store.async_add(
+                job.camera,
+                job.label,
+                job.event_id,
+                result.text,
+                result.model,
+                result.fields,
+            )
+        self.hass.bus.async_fire(
+            EVENT_BACKFILL_ANALYSIS,
+            {
+                "camera": job.camera,
+                "event_id": job.event_id,
+                "label": job.label,
+                "confidence": f"{confidence:.1%}",
+                "confidence_raw": confidence,
+                "analysis": result.text,
+                "model": result.model,
+                "activity_score": result.activity_score,
+                "duplicate_of": result.duplicate_of,
+                "duplicate_distance": result.duplicate_distance,
+                "tokens": result.tokens,
+                "analysis_id": analysis_id,
+                **result.fields,
+                "detection_time": detection_time.isoformat(),
+            },
+        )
@@ -20,12 +20,67 @@ from .const import (
     CONF_MQTT_TOPIC,
     CONF_CAMERAS,
     CONF_PROMPT,
+    CONF_EXTRA_API_KEYS,
+    CONF_MODEL,
+    CONF_LABEL_MODELS,
+    CONF_FALLBACK_MODEL,
+    CONF_LATENCY_BUDGET,
+    CONF_STRUCTURED_OUTPUT,
+    CONF_MAX_OUTPUT_TOKENS,
+    CONF_DRAIN_TIMEOUT,
+    CONF_PRESCREEN,
+    CONF_PRESCREEN_THRESHOLD,
+    CONF_PRESCREEN_ACTION,
+    CONF_CORRELATION_GROUP,
+    CONF_CORRELATION_WINDOW,
+    CONF_DEDUP,
+    CONF_DEDUP_DISTANCE,
+    CONF_DEDUP_ACTION,
+    CONF_RECORDING_WINDOW,
+    CONF_CLIP_PADDING,
+    CONF_MAX_CLIP_DURATION,
+    CONF_CAMERA_PRIORITY,
+    CONF_LABEL_PRIORITIES,
+    CONF_VIDEO_FPS,
+    CONF_LABEL_VIDEO_FPS,
+    CONF_VIDEO_START_OFFSET,
+    CONF_VIDEO_END_OFFSET,
+    CONF_ANALYSIS_ATTRIBUTE,
     DEFAULT_MQTT_TOPIC,
     DEFAULT_PROMPT,
+    DEFAULT_LATENCY_BUDGET,
+    DEFAULT_MAX_OUTPUT_TOKENS,
+    DEFAULT_DRAIN_TIMEOUT,
+    DEFAULT_PRESCREEN_THRESHOLD,
+    DEFAULT_CORRELATION_WINDOW,
+    DEFAULT_DEDUP_DISTANCE,
+    DEFAULT_CLIP_PADDING,
+    DEFAULT_MAX_CLIP_DURATION,
+    DEFAULT_CAMERA_PRIORITY,
+    DEDUP_REUSE,
+    DEDUP_SKIP,
+    ANALYSIS_ATTRIBUTE_FULL,
+    ANALYSIS_ATTRIBUTE_SUMMARY,
+    ANALYSIS_ATTRIBUTE_UNRECORDED,
+    DEFAULT_ANALYSIS_ATTRIBUTE,
+    MODEL_ID,
+    PRESCREEN_SKIP,
+    PRESCREEN_SNAPSHOT,
 )
+from .util import parse_label_map, parse_label_weights
 
 _LOGGER = logging.getLogger(__name__)
 
+# Optional free-text options; shown as suggestions so they can be cleared
+OPTIONAL_TEXT_FIELDS = (
+    CONF_EXTRA_API_KEYS,
+    CONF_LABEL_MODELS,
+    CONF_FALLBACK_MODEL,
+    CONF_CORRELATION_GROUP,
+    CONF_LABEL_VIDEO_FPS,
+    CONF_LABEL_PRIORITIES,
+)
+
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_API_KEY): str,
@@ -185,6 +240,7 @@ class FrigemOptionsFlow(config_entries.OptionsFlow):
         self.entry_id = entry_id
         self.available_cameras: dict[str, str] = {}
         self.selected_camera: str | None = None
+        self.prompt: str | None = None
 
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
@@ -243,17 +299,8 @@ class FrigemOptionsFlow(config_entries.OptionsFlow):
     ) -> FlowResult:
         """Handle the prompt configuration step."""
         if user_input is not None:
-            # Update the config entry
-            self.hass.config_entries.async_update_entry(
-                self.hass.config_entries.async_get_entry(self.entry_id),
-                title=f"FriGem - {self.selected_camera}",
-                data={
-                    **self.config_data,
-                    CONF_CAMERAS: [self.selected_camera],
-                    CONF_PROMPT: user_input[CONF_PROMPT],
-                },
-            )
-            return self.async_create_entry(title="", data=user_input)
+            self.prompt = user_input[CONF_PROMPT]
+            return await self.async_step_advanced()
 
         return self.async_show_form(
             step_id="prompt",
@@ -270,3 +317,196 @@ class FrigemOptionsFlow(config_entries.OptionsFlow):
                 "label": "{label}"  # Pass through the {label} placeholder
             },
         )
+
+    async def async_step_advanced(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle the model and performance settings step."""
+        errors = {}
+
+        if user_input is not None:
+            try:
+                parse_label_map(user_input.get(CONF_LABEL_MODELS))
+            except ValueError:
+                errors[CONF_LABEL_MODELS] = "invalid_label_map"
+            try:
+                parse_label_weights(user_input.get(CONF_LABEL_PRIORITIES))
+            except ValueError:
+                errors[CONF_LABEL_PRIORITIES] = "invalid_label_weights"
+            try:
+                parse_label_weights(user_input.get(CONF_LABEL_VIDEO_FPS))
+            except ValueError:
+                errors[CONF_LABEL_VIDEO_FPS] = "invalid_label_weights"
+            if (end_offset := user_input.get(CONF_VIDEO_END_OFFSET)) and end_offset <= (
+                user_input.get(CONF_VIDEO_START_OFFSET) or 0
+            ):
+                errors[CONF_VIDEO_END_OFFSET] = "invalid_offsets"
+
+            if not errors:
+                data = {
+                    **self.config_data,
+                    **user_input,
+                    CONF_CAMERAS: [self.selected_camera],
+                    CONF_PROMPT: self.prompt,
+                }
+                # A cleared text field is left out of user_input (or empty);
+                # drop it so the old value doesn't survive
+                for key in OPTIONAL_TEXT_FIELDS:
+                    if not str(user_input.get(key) or "").strip():
+                        data.pop(key, None)
+                # Update the config entry
+                self.hass.config_entries.async_update_entry(
+                    self.hass.config_entries.async_get_entry(self.entry_id),
+                    title=f"FriGem - {self.selected_camera}",
+                    data=data,
+                )
+                return self.async_create_entry(title="", data={})
+
+        data = self.config_data
+        return self.async_show_form(
+            step_id="advanced",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_EXTRA_API_KEYS,
+                        description={"suggested_value": data.get(CONF_EXTRA_API_KEYS)},
+                    ): selector.TextSelector(
+                        selector.TextSelectorConfig(multiline=True)
+                    ),
+                    vol.Required(
+                        CONF_MODEL, default=data.get(CONF_MODEL, MODEL_ID)
+                    ): str,
+                    vol.Optional(
+                        CONF_LABEL_MODELS,
+                        description={"suggested_value": data.get(CONF_LABEL_MODELS)},
+                    ): selector.TextSelector(
+                        selector.TextSelectorConfig(multiline=True)
+                    ),
+                    vol.Optional(
+                        CONF_FALLBACK_MODEL,
+                        description={"suggested_value": data.get(CONF_FALLBACK_MODEL)},
+                    ): str,
+                    vol.Optional(
+                        CONF_LATENCY_BUDGET,
+                        default=data.get(CONF_LATENCY_BUDGET, DEFAULT_LATENCY_BUDGET),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=600)),
+                    vol.Optional(
+                        CONF_STRUCTURED_OUTPUT,
+                        default=data.get(CONF_STRUCTURED_OUTPUT, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_MAX_OUTPUT_TOKENS,
+                        default=data.get(CONF_MAX_OUTPUT_TOKENS, DEFAULT_MAX_OUTPUT_TOKENS),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=8192)),
+                    vol.Optional(
+                        CONF_DRAIN_TIMEOUT,
+                        default=data.get(CONF_DRAIN_TIMEOUT, DEFAULT_DRAIN_TIMEOUT),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=120)),
+                    vol.Optional(
+                        CONF_PRESCREEN,
+                        default=data.get(CONF_PRESCREEN, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_PRESCREEN_THRESHOLD,
+                        default=data.get(
+                            CONF_PRESCREEN_THRESHOLD, DEFAULT_PRESCREEN_THRESHOLD
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+                    vol.Optional(
+                        CONF_PRESCREEN_ACTION,
+                        default=data.get(CONF_PRESCREEN_ACTION, PRESCREEN_SKIP),
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[PRESCREEN_SKIP, PRESCREEN_SNAPSHOT],
+                            mode=selector.SelectSelectorMode.DROPDOWN,
+                            translation_key=CONF_PRESCREEN_ACTION,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_CORRELATION_GROUP,
+                        description={"suggested_value": data.get(CONF_CORRELATION_GROUP)},
+                    ): str,
+                    vol.Optional(
+                        CONF_CORRELATION_WINDOW,
+                        default=data.get(
+                            CONF_CORRELATION_WINDOW, DEFAULT_CORRELATION_WINDOW
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=300)),
+                    vol.Optional(
+                        CONF_DEDUP,
+                        default=data.get(CONF_DEDUP, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_DEDUP_DISTANCE,
+                        default=data.get(CONF_DEDUP_DISTANCE, DEFAULT_DEDUP_DISTANCE),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=32)),
+                    vol.Optional(
+                        CONF_DEDUP_ACTION,
+                        default=data.get(CONF_DEDUP_ACTION, DEDUP_REUSE),
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[DEDUP_REUSE, DEDUP_SKIP],
+                            mode=selector.SelectSelectorMode.DROPDOWN,
+                            translation_key=CONF_DEDUP_ACTION,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_RECORDING_WINDOW,
+                        default=data.get(CONF_RECORDING_WINDOW, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_CLIP_PADDING,
+                        default=data.get(CONF_CLIP_PADDING, DEFAULT_CLIP_PADDING),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=60)),
+                    vol.Optional(
+                        CONF_MAX_CLIP_DURATION,
+                        default=data.get(CONF_MAX_CLIP_DURATION, DEFAULT_MAX_CLIP_DURATION),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=600)),
+                    vol.Optional(
+                        CONF_VIDEO_FPS,
+                        default=data.get(CONF_VIDEO_FPS, 0),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=24)),
+                    vol.Optional(
+                        CONF_LABEL_VIDEO_FPS,
+                        description={"suggested_value": data.get(CONF_LABEL_VIDEO_FPS)},
+                    ): selector.TextSelector(
+                        selector.TextSelectorConfig(multiline=True)
+                    ),
+                    vol.Optional(
+                        CONF_VIDEO_START_OFFSET,
+                        default=data.get(CONF_VIDEO_START_OFFSET, 0),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=600)),
+                    vol.Optional(
+                        CONF_VIDEO_END_OFFSET,
+                        default=data.get(CONF_VIDEO_END_OFFSET, 0),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=600)),
+                    vol.Optional(
+                        CONF_CAMERA_PRIORITY,
+                        default=data.get(CONF_CAMERA_PRIORITY, DEFAULT_CAMERA_PRIORITY),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=100)),
+                    vol.Optional(
+                        CONF_LABEL_PRIORITIES,
+                        description={"suggested_value": data.get(CONF_LABEL_PRIORITIES)},
+                    ): selector.TextSelector(
+                        selector.TextSelectorConfig(multiline=True)
+                    ),
+                    vol.Optional(
+                        CONF_ANALYSIS_ATTRIBUTE,
+                        default=data.get(
+                            CONF_ANALYSIS_ATTRIBUTE, DEFAULT_ANALYSIS_ATTRIBUTE
+                        ),
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[
+                                ANALYSIS_ATTRIBUTE_FULL,
+                                ANALYSIS_ATTRIBUTE_UNRECORDED,
+                                ANALYSIS_ATTRIBUTE_SUMMARY,
+                            ],
+                            mode=selector.SelectSelectorMode.DROPDOWN,
+                            translation_key=CONF_ANALYSIS_ATTRIBUTE,
+                        )
+                    ),
+                }
+            ),
+            errors=errors,
+        )
@@ -8,10 +8,60 @@ CONF_FRIGATE_URL = "frigate_url"
 CONF_MQTT_TOPIC = "mqtt_topic"
 CONF_CAMERAS = "cameras"
 CONF_PROMPT = "prompt"
+CONF_EXTRA_API_KEYS = "extra_api_keys"
+CONF_MODEL = "model"
+CONF_LABEL_MODELS = "label_models"
+CONF_FALLBACK_MODEL = "fallback_model"
+CONF_LATENCY_BUDGET = "latency_budget"
+CONF_STRUCTURED_OUTPUT = "structured_output"
+CONF_MAX_OUTPUT_TOKENS = "max_output_tokens"
+CONF_DRAIN_TIMEOUT = "drain_timeout"
+CONF_PRESCREEN = "prescreen"
+CONF_PRESCREEN_THRESHOLD = "prescreen_threshold"
+CONF_PRESCREEN_ACTION = "prescreen_action"
+CONF_CORRELATION_GROUP = "correlation_group"
+CONF_CORRELATION_WINDOW = "correlation_window"
+CONF_DEDUP = "dedup"
+CONF_DEDUP_DISTANCE = "dedup_distance"
+CONF_DEDUP_ACTION = "dedup_action"
+CONF_RECORDING_WINDOW = "recording_window"
+CONF_CLIP_PADDING = "clip_padding"
+CONF_MAX_CLIP_DURATION = "max_clip_duration"
+CONF_CAMERA_PRIORITY = "camera_priority"
+CONF_LABEL_PRIORITIES = "label_priorities"
+CONF_VIDEO_FPS = "video_fps"
+CONF_LABEL_VIDEO_FPS = "label_video_fps"
+CONF_VIDEO_START_OFFSET = "video_start_offset"
+CONF_VIDEO_END_OFFSET = "video_end_offset"
+CONF_ANALYSIS_ATTRIBUTE = "analysis_attribute"
+CONF_SPOOL_DIR = "spool_dir"
+CONF_SPOOL_BUDGET = "spool_budget_mb"
+CONF_TRACE_FILE = "trace_file"
+CONF_LOOP_WATCHDOG = "loop_watchdog"
+CONF_WORKER_SOCKET = "worker_socket"
+CONF_MAX_PARALLEL = "max_parallel"
+CONF_SPAWN_WORKER = "spawn_worker"
 
 # Defaults
 DEFAULT_MQTT_TOPIC = "frigate/events"
 DEFAULT_PROMPT = "Provide a summary of the events in the video. Focus more on the {label}."
+GROUP_PROMPT = (
+    "These {count} videos were recorded at the same time by the cameras "
+    "{cameras}, in that order. They show a single event; describe it once. "
+    "{prompt}"
+)
+
+DEFAULT_KEY_RPM = 10  # Requests per minute assumed for each API key
+DEFAULT_LATENCY_BUDGET = 0  # seconds, 0 disables hedging
+DEFAULT_MAX_OUTPUT_TOKENS = 0  # 0 leaves the model's own limit
+DEFAULT_DRAIN_TIMEOUT = 5  # seconds in-flight jobs may finish during unload
+DEFAULT_PRESCREEN_THRESHOLD = 0.005  # Share of pixels that must change
+DEFAULT_CORRELATION_WINDOW = 30  # seconds events of a camera group may be apart
+DEFAULT_DEDUP_DISTANCE = 6  # Differing hash bits (of 128) still counted as a repeat
+DEFAULT_CLIP_PADDING = 2  # seconds of recordings kept around an event window
+DEFAULT_MAX_CLIP_DURATION = 60  # seconds, longest window cut from recordings
+DEFAULT_CAMERA_PRIORITY = 1.0  # Weight of the camera's events in the queue
+DEFAULT_SPOOL_BUDGET = 512  # MiB of clips kept on disk across all cameras
 
 # Attributes
 ATTR_CAMERA = "camera"
@@ -23,6 +73,31 @@ ATTR_CONFIDENCE = "confidence"
 ATTR_CONFIDENCE_RAW = "confidence_raw"
 ATTR_DETECTION_TIME = "detection_time"
 ATTR_LAST_UPDATED = "last_updated"
+ATTR_MODEL = "model"
+ATTR_SUMMARY = "summary"
+ATTR_ACTIVITY = "activity"
+ATTR_THREAT_LEVEL = "threat_level"
+ATTR_OBJECTS = "objects"
+ATTR_TRUNCATED = "truncated"
+ATTR_ACTIVITY_SCORE = "activity_score"
+ATTR_GROUP = "group"
+ATTR_CAMERAS = "cameras"
+ATTR_EVENT_IDS = "event_ids"
+ATTR_DUPLICATE_OF = "duplicate_of"
+ATTR_DUPLICATE_DISTANCE = "duplicate_distance"
+ATTR_TRACE_ID = "trace_id"
+ATTR_TOKENS = "tokens"
+ATTR_ANALYSIS_ID = "analysis_id"
+ATTR_VIDEO_PATH = "video_path"
+ATTR_MAX_PARALLEL = "max_parallel"
+ATTR_TOTAL = "total"
+ATTR_COMPLETED = "completed"
+ATTR_FAILED = "failed"
+ATTR_RUNNING = "running"
+ATTR_START_TIME = "start_time"
+ATTR_END_TIME = "end_time"
+ATTR_LABELS = "labels"
+ATTR_RATE = "rate"
 
 # Sensor States
 STATE_NO_DETECTION = "No detection"
@@ -31,12 +106,99 @@ STATE_DETECTION_FORMAT = "{label} detected at {time} ({confidence}% confidence)"
 # Gemini API
 MODEL_ID = "gemini-2.0-flash-exp"  # Model for video analysis
 
+# Allowed values of the structured threat_level field
+THREAT_LEVELS = ["none", "low", "medium", "high"]
+
+# What to do with clips below the pre-screen activity threshold
+PRESCREEN_SKIP = "skip"
+PRESCREEN_SNAPSHOT = "snapshot"
+
+# What to do with clips that repeat a recent one
+DEDUP_REUSE = "reuse"
+DEDUP_SKIP = "skip"
+DEDUP_INDEX_SIZE = 20  # Recent hashes kept per camera
+DEDUP_MAX_AGE = 6 * 3600  # seconds an analysis may be reused
+
+# How the analysis text appears in sensor attributes
+ANALYSIS_ATTRIBUTE_FULL = "full"
+ANALYSIS_ATTRIBUTE_UNRECORDED = "unrecorded"  # Full text, left out of the recorder
+ANALYSIS_ATTRIBUTE_SUMMARY = "summary"  # Shortened text; full text via get_analysis
+DEFAULT_ANALYSIS_ATTRIBUTE = ANALYSIS_ATTRIBUTE_UNRECORDED
+ANALYSIS_SUMMARY_LENGTH = 200  # Characters kept in summary mode
+ANALYSIS_STORE_LIMIT = 500  # Full analysis texts kept across all cameras
+# Bulky attributes excluded from the recorder in unrecorded mode
+UNRECORDED_ATTRIBUTES = frozenset(
+    {ATTR_ANALYSIS, ATTR_SUMMARY, ATTR_ACTIVITY, ATTR_LAST_UPDATED}
+)
+
+# Approximate list prices in USD per million (input, output) tokens
+MODEL_PRICING = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
 # Frigate API
 FRIGATE_HOST = "localhost:5000"  # Frigate runs on port 5000
 FRIGATE_CLIP_URL = "http://{host}/api/events/{event_id}/clip.mp4"
 
 # Services
 SERVICE_ANALYZE_VIDEO = "analyze_video"
+SERVICE_BACKFILL = "backfill"
+SERVICE_CANCEL_BACKFILL = "cancel_backfill"
+SERVICE_GET_ANALYSIS = "get_analysis"
+DEFAULT_LABEL = "object"  # Label used for ad-hoc clips without a Frigate event
+
+# Events
+EVENT_ANALYSIS_COMPLETE = f"{DOMAIN}_analysis_complete"
+EVENT_BACKFILL_ANALYSIS = f"{DOMAIN}_backfill_analysis"
+
+# Analysis pipeline
+DEFAULT_MAX_PARALLEL = 2  # Clips analysed at the same time across all cameras
+MAX_PARALLEL_LIMIT = 8  # Upper bound for the pipeline's max_parallel setting
+BACKGROUND_RESERVED_SLOTS = 1  # Slots background jobs never take from live events
+PRIORITY_AGING_RATE = 0.05  # Priority a waiting job gains per second
+
+# Clip readiness
+CLIP_READY_TIMEOUT = 60  # seconds to wait for Frigate to finalize a clip
+CLIP_PROBE_INTERVAL = 1  # seconds between the first probes, doubling each time
+CLIP_PROBE_MAX_INTERVAL = 8  # seconds, longest gap between probes
+TRACKED_EVENTS_LIMIT = 500  # Events whose clip state is remembered per entry
+
+# Backfill
+BACKFILL_PAGE_SIZE = 50  # Events requested per Frigate API page
+DEFAULT_BACKFILL_RATE = 6  # Events analysed per minute
+MAX_BACKFILL_RATE = 60
+BACKFILL_HISTORY_SIZE = 5000  # Analysed event IDs remembered per entry
+STORAGE_VERSION = 1
+
+# Shared (non-entry) keys in hass.data[DOMAIN]
+DATA_PIPELINE = "pipeline"
+DATA_SPOOL = "spool"
+DATA_PRESCREENER = "prescreener"
+DATA_CORRELATOR = "correlator"
+DATA_TRACER = "tracer"
+DATA_WATCHDOG = "watchdog"
+DATA_ANALYSES = "analyses"
+DATA_WORKER = "worker"
+
+# Analysis worker
+WORKER_MODULE = f"custom_components.{DOMAIN}.worker"
+WORKER_PING_INTERVAL = 10  # seconds between liveness checks of the worker
+WORKER_PING_TIMEOUT = 10  # seconds without a reply before the worker counts as stalled
+WORKER_CONNECT_TIMEOUT = 30  # seconds a job waits for the worker to (re)connect
+WORKER_RESTART_DELAY = 5  # seconds between connection or restart attempts
+WORKER_STOP_TIMEOUT = 5  # seconds a spawned worker gets to exit before it is killed
+WORKER_STREAM_LIMIT = 16 * 1024 * 1024  # Longest protocol line; snapshots travel inline
+
+# Tracing
+TRACE_BUFFER_SIZE = 200  # Recent traces kept across all cameras
+LOOP_STALL_HISTORY = 20  # Event loop stalls kept by the watchdog
+
+# Dispatcher signals
+SIGNAL_PROGRESS = f"{DOMAIN}_progress_{{entry_id}}"
 
 # Error messages
 ERROR_GEMINI_API = "Error communicating with Gemini API"
@@ -0,0 +1,150 @@
+"""Correlation of overlapping events from cameras in the same group."""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .pipeline import AnalysisJob
+
+if TYPE_CHECKING:
+    from .mqtt_handler import MQTTHandler
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class CorrelatedEvent:
+    """One camera's event waiting to be grouped."""
+
+    handler: MQTTHandler
+    job: AnalysisJob
+
+    @property
+    def start_time(self) -> float:
+        """Return when the event started."""
+        return self.job.start_time or self.end_time
+
+    @property
+    def end_time(self) -> float:
+        """Return when the event ended."""
+        return self.job.end_time or 0
+
+
+@dataclass
+class EventGroup:
+    """Events of one camera group and label whose time windows overlap."""
+
+    name: str
+    label: str
+    window: float
+    members: list[CorrelatedEvent] = field(default_factory=list)
+    cancel_timer: Callable[[], None] | None = None
+
+    @property
+    def group_id(self) -> str:
+        """Return an identifier for the combined analysis."""
+        return f"{self.name}-{self.members[0].job.event_id}"
+
+    def overlaps(self, start_time: float, end_time: float) -> bool:
+        """Return True if an event falls within the window of the group."""
+        first = min(member.start_time for member in self.members)
+        last = max(member.end_time for member in self.members)
+        return start_time <= last + self.window and end_time >= first - self.window
+
+
+class EventCorrelator:
+    """Hold back grouped events briefly so overlapping ones are analysed once.
+
+    Each event of a camera that belongs to a group waits up to the group's
+    window for matching events (same label, overlapping time) from the other
+    cameras of the group. A lone event is then analysed as usual; several
+    are sent to Gemini together by the handler of the first camera.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the correlator."""
+        self.hass = hass
+        self._groups: list[EventGroup] = []
+
+    @callback
+    def async_add(
+        self,
+        name: str,
+        window: float,
+        handler: MQTTHandler,
+        job: AnalysisJob,
+    ) -> None:
+        """Add an event, joining an open group or starting a new one."""
+        event = CorrelatedEvent(handler, job)
+        group = next(
+            (
+                group
+                for group in self._groups
+                if group.name == name
+                and group.label == job.label
+                and group.overlaps(event.start_time, event.end_time)
+            ),
+            None,
+        )
+        if group is None:
+            group = EventGroup(name, job.label, window)
+            self._groups.append(group)
+            _LOGGER.debug(
+                "[CORRELATE] Holding %s from %s for up to %ss",
+                job.event_id,
+                job.camera,
+                window,
+            )
+        else:
+            _LOGGER.debug(
+                "[CORRELATE] Grouping %s from %s with %s",
+                job.event_id,
+                job.camera,
+                group.group_id,
+            )
+            group.cancel_timer()
+        group.members.append(event)
+
+        @callback
+        def _flush(_now: Any) -> None:
+            self._async_flush(group)
+
+        group.cancel_timer = async_call_later(self.hass, group.window, _flush)
+
+    @callback
+    def _async_flush(self, group: EventGroup) -> None:
+        """Close a group and start its analysis."""
+        self._groups.remove(group)
+        group.cancel_timer = None
+        if len(group.members) == 1:
+            member = group.members[0]
+            self.hass.async_create_task(member.handler.async_process_job(member.job))
+            return
+
+        _LOGGER.info(
+            "[CORRELATE] Analysing %d %s events of group %s together: %s",
+            len(group.members),
+            group.label,
+            group.name,
+            ", ".join(member.job.camera for member in group.members),
+        )
+        leader = group.members[0].handler
+        self.hass.async_create_task(leader.async_process_group(group))
+
+    @callback
+    def async_remove_handler(self, handler: MQTTHandler) -> list[AnalysisJob]:
+        """Drop the waiting events of an unloading handler and return their jobs."""
+        jobs = []
+        for group in list(self._groups):
+            jobs += [member.job for member in group.members if member.handler is handler]
+            group.members = [
+                member for member in group.members if member.handler is not handler
+            ]
+            if not group.members:
+                group.cancel_timer()
+                self._groups.remove(group)
+        return jobs
@@ -0,0 +1,98 @@
+"""Near-duplicate detection of clips by perceptual hash."""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from .const import DEDUP_INDEX_SIZE, DEDUP_MAX_AGE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexedAnalysis:
+    """A recent analysis and the hash of the clip it came from."""
+
+    phash: int
+    label: str
+    event_id: str | None
+    text: str
+    model: str
+    fields: dict[str, Any] = field(default_factory=dict)
+    event_time: float = field(default_factory=time.time)  # When the event started
+
+
+class DuplicateIndex:
+    """Remember the hashes of recent analyses per camera.
+
+    A new clip whose hash is within max_distance bits of a clip with the
+    same label whose event started at most DEDUP_MAX_AGE apart is treated as
+    a repeat of that clip. Ages are measured between the events' own start
+    times, so backfilled or resumed clips only match events of their time.
+    """
+
+    def __init__(self, max_distance: int) -> None:
+        """Initialize the index."""
+        self.max_distance = max_distance
+        self._recent: dict[str, deque[IndexedAnalysis]] = {}
+        self.checked = 0
+        self.duplicates = 0
+        self.last_distance: int | None = None
+
+    def match(
+        self, camera: str, label: str, phash: str, event_time: float
+    ) -> tuple[IndexedAnalysis, int] | None:
+        """Return the closest analysis near event_time within the distance, if any."""
+        value = int(phash, 16)
+        recent = self._recent.get(camera, ())
+        best: tuple[IndexedAnalysis, int] | None = None
+        for entry in recent:
+            if entry.label != label or abs(event_time - entry.event_time) > DEDUP_MAX_AGE:
+                continue
+            distance = (value ^ entry.phash).bit_count()
+            if best is None or distance < best[1]:
+                best = (entry, distance)
+
+        self.checked += 1
+        self.last_distance = best[1] if best else None
+        if best is None or best[1] > self.max_distance:
+            return None
+        self.duplicates += 1
+        _LOGGER.debug(
+            "[DEDUP] Clip on %s matches event %s (distance %d)",
+            camera,
+            best[0].event_id,
+            best[1],
+        )
+        return best
+
+    def add(
+        self,
+        camera: str,
+        label: str,
+        phash: str,
+        event_id: str | None,
+        text: str,
+        model: str,
+        fields: dict[str, Any],
+        event_time: float,
+    ) -> None:
+        """Index a fresh analysis, dropping the oldest beyond the limit."""
+        self._recent.setdefault(camera, deque(maxlen=DEDUP_INDEX_SIZE)).append(
+            IndexedAnalysis(
+                int(phash, 16), label, event_id, text, model, fields, event_time
+            )
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters."""
+        return {
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "last_distance": self.last_distance,
+            "max_distance": self.max_distance,
+            "indexed": {camera: len(recent) for camera, recent in self._recent.items()},
+        }
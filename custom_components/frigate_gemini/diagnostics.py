@@ -0,0 +1,58 @@
+"""Diagnostics support for FriGem."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    CONF_API_KEY,
+    CONF_CAMERAS,
+    CONF_EXTRA_API_KEYS,
+    DATA_PIPELINE,
+    DATA_TRACER,
+    DATA_WATCHDOG,
+    DATA_ANALYSES,
+    DATA_WORKER,
+)
+
+TO_REDACT = {CONF_API_KEY, CONF_EXTRA_API_KEYS}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data = hass.data[DOMAIN].get(entry.entry_id, {})
+    diagnostics: dict[str, Any] = {
+        "entry": async_redact_data(entry.data, TO_REDACT),
+        "startup_timings": data.get("startup_timings"),
+    }
+
+    if gemini_handler := data.get("gemini_handler"):
+        diagnostics.update(await gemini_handler.async_diagnostics())
+
+    if mqtt_handler := data.get("mqtt_handler"):
+        diagnostics["clip_readiness"] = mqtt_handler.readiness.as_dict()
+        if mqtt_handler.dedup:
+            diagnostics["dedup"] = mqtt_handler.dedup.as_dict()
+
+    if pipeline := hass.data[DOMAIN].get(DATA_PIPELINE):
+        diagnostics["pipeline"] = pipeline.as_dict()
+
+    if analyses := hass.data[DOMAIN].get(DATA_ANALYSES):
+        diagnostics["analysis_store"] = analyses.as_dict()
+
+    if tracer := hass.data[DOMAIN].get(DATA_TRACER):
+        diagnostics["traces"] = tracer.as_list(entry.data.get(CONF_CAMERAS))
+
+    if worker := hass.data[DOMAIN].get(DATA_WORKER):
+        diagnostics["worker"] = worker.as_dict()
+
+    if watchdog := hass.data[DOMAIN].get(DATA_WATCHDOG):
+        diagnostics["loop_stalls"] = watchdog.as_dict()
+
+    return diagnostics
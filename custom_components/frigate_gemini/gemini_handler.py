@@ -1,21 +1,30 @@
 """Handle interactions with Google's Gemini API."""
 from __future__ import annotations
 
+import json
 import logging
+import re
 import asyncio
 import time
+from dataclasses import dataclass, field
 from typing import Any
 from functools import partial
 from concurrent.futures import ThreadPoolExecutor
 
-from google import genai
-from google.genai import types
-from google.api_core import exceptions as google_exceptions
-
+from .key_pool import KeyPool
+from .tracing import span
 from .const import (
+    ATTR_ACTIVITY,
+    ATTR_OBJECTS,
+    ATTR_SUMMARY,
+    ATTR_THREAT_LEVEL,
+    ATTR_TRUNCATED,
+    DEFAULT_KEY_RPM,
     DEFAULT_PROMPT,
     ERROR_GEMINI_API,
     MODEL_ID,
+    MODEL_PRICING,
+    THREAT_LEVELS,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -24,6 +33,23 @@ _LOGGER = logging.getLogger(__name__)
 MAX_RETRIES = 5
 RETRY_DELAY = 10  # seconds
 MAX_PROCESSING_TIME = 120  # seconds
+EXECUTOR_WORKERS = 4  # Room for a hedged request next to the primary one
+QUOTA_BENCH_TIME = 60  # seconds a key rests after a quota error
+AUTH_BENCH_TIME = 3600  # seconds a key rests after a permission error
+
+# The Gemini SDK is slow to import, so it is loaded in the executor on first use
+genai: Any = None
+types: Any = None
+
+
+def _load_sdk() -> None:
+    """Import the Gemini SDK. Blocking; run in an executor."""
+    global genai, types  # pylint: disable=global-statement
+    if genai is None:
+        from google import genai as genai_module  # pylint: disable=import-outside-toplevel
+        from google.genai import types as types_module  # pylint: disable=import-outside-toplevel
+
+        genai, types = genai_module, types_module
 
 # Gemini File States
 FILE_STATE_PROCESSING = "PROCESSING"
@@ -35,26 +61,153 @@ class GeminiAPIError(Exception):
     """Gemini API Error."""
 
 
+class GeminiQuotaError(GeminiAPIError):
+    """Quota or rate limit exceeded for an API key."""
+
+
+class GeminiAuthError(GeminiAPIError):
+    """API key rejected or lacking permissions."""
+
+
+@dataclass
+class AnalysisResult:
+    """Outcome of a single video analysis."""
+
+    text: str
+    model: str
+    latency: float
+    hedged: bool = False
+    fields: dict[str, Any] = field(default_factory=dict)
+    activity_score: float | None = None
+    skipped: bool = False
+    duplicate_of: str | None = None
+    duplicate_distance: int | None = None
+    tokens: dict[str, int] | None = None
+
+
+def _video_tokens(usage: Any) -> int:
+    """Return the prompt tokens spent on video frames."""
+    return sum(
+        detail.token_count or 0
+        for detail in usage.prompt_tokens_details or []
+        if str(detail.modality).endswith("VIDEO")
+    )
+
+
+class ModelStats:
+    """Latency and cost counters for one model."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.calls = 0
+        self.failures = 0
+        self.wins = 0
+        self.total_latency = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.video_tokens = 0
+
+    def record(self, latency: float, usage: Any) -> None:
+        """Record a successful call."""
+        self.calls += 1
+        self.total_latency += latency
+        if usage is not None:
+            self.input_tokens += usage.prompt_token_count or 0
+            self.output_tokens += usage.candidates_token_count or 0
+            self.video_tokens += _video_tokens(usage)
+
+    def as_dict(self, model: str) -> dict[str, Any]:
+        """Return the counters, with an estimated cost if the model is known."""
+        data = {
+            "calls": self.calls,
+            "failures": self.failures,
+            "wins": self.wins,
+            "avg_latency": round(self.total_latency / self.calls, 2) if self.calls else None,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "video_tokens": self.video_tokens,
+            "estimated_cost_usd": None,
+        }
+        if pricing := MODEL_PRICING.get(model):
+            data["estimated_cost_usd"] = round(
+                (self.input_tokens * pricing[0] + self.output_tokens * pricing[1])
+                / 1_000_000,
+                4,
+            )
+        return data
+
+
 class GeminiHandler:
     """Handle interactions with Gemini API."""
 
-    def __init__(self, api_key: str) -> None:
+    def __init__(
+        self,
+        api_keys: list[str],
+        model: str = MODEL_ID,
+        label_models: dict[str, str] | None = None,
+        fallback_model: str | None = None,
+        latency_budget: float = 0,
+        structured_output: bool = False,
+        max_output_tokens: int = 0,
+        requests_per_minute: int = DEFAULT_KEY_RPM,
+        video_fps: float = 0,
+        label_video_fps: dict[str, float] | None = None,
+        video_start_offset: float = 0,
+        video_end_offset: float = 0,
+    ) -> None:
         """Initialize the handler."""
-        if not api_key or len(api_key.strip()) < 10:
+        if not api_keys or any(len(api_key.strip()) < 10 for api_key in api_keys):
             raise ValueError("Invalid API key format")
 
-        _LOGGER.debug("[GEMINI] Initializing Gemini handler with API key")
-        try:
-            self.client = genai.Client(api_key=api_key)
-            self._executor = ThreadPoolExecutor(max_workers=2)
-            _LOGGER.debug("[GEMINI] Successfully initialized Gemini")
-        except Exception as err:
-            _LOGGER.error("[GEMINI] Error initializing Gemini: %s", str(err))
-            if "permission" in str(err).lower() or "unauthorized" in str(err).lower():
-                raise ValueError(
-                    "Invalid Gemini API key. Please check your API key and try again."
-                ) from err
-            raise
+        self.model = model
+        self.label_models = label_models or {}
+        self.fallback_model = fallback_model
+        self.latency_budget = latency_budget
+        self.structured_output = structured_output
+        self.max_output_tokens = max_output_tokens
+        self.video_fps = video_fps
+        self.label_video_fps = label_video_fps or {}
+        self.video_start_offset = video_start_offset
+        self.video_end_offset = video_end_offset
+        self.model_stats: dict[str, ModelStats] = {}
+        self.timings: dict[str, float] = {}
+
+        _LOGGER.debug("[GEMINI] Initializing Gemini handler with %d API keys", len(api_keys))
+        self.key_pool = KeyPool(
+            [api_key.strip() for api_key in api_keys], requests_per_minute
+        )
+        self._executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS)
+        self._prepare_lock = asyncio.Lock()
+        self._prepared = False
+
+    def _prepare(self) -> None:
+        """Import the SDK and build the clients. Blocking; run in the executor."""
+        start = time.perf_counter()
+        _load_sdk()
+        self.timings["sdk_import"] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        self.key_pool.create_clients(lambda api_key: genai.Client(api_key=api_key))
+        self.timings["client_construction"] = round(time.perf_counter() - start, 3)
+
+    async def async_prepare(self) -> None:
+        """Load the SDK and clients off the event loop, once."""
+        async with self._prepare_lock:
+            if self._prepared:
+                return
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._prepare
+                )
+            except Exception as err:
+                _LOGGER.error("[GEMINI] Error initializing Gemini: %s", str(err))
+                if "permission" in str(err).lower() or "unauthorized" in str(err).lower():
+                    raise ValueError(
+                        "Invalid Gemini API key. Please check your API key and try again."
+                    ) from err
+                raise
+            self._prepared = True
+            _LOGGER.debug("[GEMINI] Successfully initialized Gemini: %s", self.timings)
 
     async def _run_in_executor(self, func, *args, **kwargs):
         """Run blocking function in executor."""
@@ -67,48 +220,268 @@ class GeminiHandler:
             error_msg = str(err).lower()
             if "permission" in error_msg or "unauthorized" in error_msg:
                 _LOGGER.error("[GEMINI] API key error: %s", str(err))
-                raise GeminiAPIError(
+                raise GeminiAuthError(
                     "Invalid API key or insufficient permissions"
                 ) from err
-            elif "quota" in error_msg or "rate limit" in error_msg:
+            elif (
+                "quota" in error_msg
+                or "rate limit" in error_msg
+                or "resource_exhausted" in error_msg
+            ):
                 _LOGGER.error("[GEMINI] API quota exceeded: %s", str(err))
-                raise GeminiAPIError(
+                raise GeminiQuotaError(
                     "API quota exceeded. Please try again later."
                 ) from err
             else:
                 _LOGGER.error("[GEMINI] API error: %s", str(err))
                 raise GeminiAPIError(str(err)) from err
 
-    async def analyze_video(
-        self, video_path: str, prompt: str | None, label: str
-    ) -> str:
-        """Analyze a video using Gemini."""
+    def select_model(self, label: str) -> str:
+        """Return the primary model for a label."""
+        return self.label_models.get(label, self.model)
+
+    def _video_metadata(self, label: str) -> types.VideoMetadata | None:
+        """Return the sampling rate and offsets for a label's videos, if any."""
+        fps = self.label_video_fps.get(label, self.video_fps)
+        if not fps and not self.video_start_offset and not self.video_end_offset:
+            return None
+        return types.VideoMetadata(
+            fps=fps or None,
+            start_offset=f"{self.video_start_offset}s" if self.video_start_offset else None,
+            end_offset=f"{self.video_end_offset}s" if self.video_end_offset else None,
+        )
+
+    def _stats(self, model: str) -> ModelStats:
+        """Return the counters for a model."""
+        return self.model_stats.setdefault(model, ModelStats())
+
+    def _generation_config(self) -> types.GenerateContentConfig | None:
+        """Return the response schema and token budget, if any is configured."""
+        if not self.structured_output and not self.max_output_tokens:
+            return None
+        config = types.GenerateContentConfig(
+            max_output_tokens=self.max_output_tokens or None,
+        )
+        if self.structured_output:
+            config.response_mime_type = "application/json"
+            config.response_schema = types.Schema(
+                type=types.Type.OBJECT,
+                properties={
+                    ATTR_SUMMARY: types.Schema(type=types.Type.STRING),
+                    ATTR_ACTIVITY: types.Schema(type=types.Type.STRING),
+                    ATTR_THREAT_LEVEL: types.Schema(
+                        type=types.Type.STRING, enum=THREAT_LEVELS
+                    ),
+                    ATTR_OBJECTS: types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(type=types.Type.STRING),
+                    ),
+                },
+                required=[ATTR_SUMMARY, ATTR_ACTIVITY, ATTR_THREAT_LEVEL, ATTR_OBJECTS],
+            )
+        return config
+
+    @staticmethod
+    def _parse_fields(text: str) -> dict[str, Any]:
+        """Parse a structured response.
+
+        JSON cut off by the token budget is salvaged field by field: string
+        fields are kept as far as they arrived and the result is flagged
+        with truncated. Raises GeminiAPIError if there is no summary, complete
+        or not.
+        """
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            if not isinstance(data.get(ATTR_SUMMARY), str) or not data[ATTR_SUMMARY]:
+                raise GeminiAPIError(f"Structured response has no summary: {text!r}")
+            return {
+                key: data[key]
+                for key in (ATTR_SUMMARY, ATTR_ACTIVITY, ATTR_THREAT_LEVEL, ATTR_OBJECTS)
+                if key in data
+            }
+
+        fields: dict[str, Any] = {}
+        for key in (ATTR_SUMMARY, ATTR_ACTIVITY, ATTR_THREAT_LEVEL):
+            # The closing quote is optional: the last field may be cut off
+            if match := re.search(rf'"{key}"\s*:\s*"((?:[^"\\]|\\.)*)', text or ""):
+                # Drop a \uXXXX escape the cut-off split
+                value = re.sub(r"\\u[0-9a-fA-F]{0,3}$", "", match.group(1))
+                try:
+                    fields[key] = json.loads(f'"{value}"')
+                except ValueError:
+                    continue
+        if fields.get(ATTR_THREAT_LEVEL) not in THREAT_LEVELS:
+            fields.pop(ATTR_THREAT_LEVEL, None)
+        if not fields.get(ATTR_SUMMARY):
+            raise GeminiAPIError(f"Unusable structured response: {text!r}")
+        _LOGGER.warning("[GEMINI] Structured response was truncated: %s", text)
+        fields[ATTR_TRUNCATED] = True
+        return fields
+
+    async def _generate(
+        self,
+        client: genai.Client,
+        model: str,
+        contents: list,
+        config: types.GenerateContentConfig | None = None,
+    ) -> tuple[Any, float]:
+        """Generate content with one model, recording latency and usage."""
+        start = time.monotonic()
         try:
-            _LOGGER.debug(
-                "[GEMINI] Preparing to analyze video: %s with label: %s",
-                video_path,
-                label,
+            response = await self._run_in_executor(
+                client.models.generate_content,
+                model=model,
+                contents=contents,
+                config=config,
             )
+        except Exception:
+            self._stats(model).failures += 1
+            raise
+        latency = time.monotonic() - start
+        if not response or not response.text:
+            self._stats(model).failures += 1
+            raise GeminiAPIError(f"Empty response from Gemini API ({model})")
+        self._stats(model).record(latency, getattr(response, "usage_metadata", None))
+        return response, latency
 
-            # Format the prompt
-            if not prompt:
-                _LOGGER.debug("[GEMINI] No custom prompt provided, using default")
-                prompt = DEFAULT_PROMPT
-            formatted_prompt = prompt.format(label=label)
-            _LOGGER.debug("[GEMINI] Using prompt: %s", formatted_prompt)
+    async def _generate_hedged(
+        self,
+        client: genai.Client,
+        model: str,
+        contents: list,
+        config: types.GenerateContentConfig | None = None,
+    ) -> tuple[Any, str, float, bool]:
+        """Generate content, hedging to the fallback model past the latency budget.
+
+        The first successful answer wins; the other request is abandoned.
+        """
+        fallback = self.fallback_model
+        primary = asyncio.ensure_future(self._generate(client, model, contents, config))
+        if not fallback or fallback == model or not self.latency_budget:
+            response, latency = await primary
+            return response, model, latency, False
+
+        done, _ = await asyncio.wait({primary}, timeout=self.latency_budget)
+        if primary in done and not primary.exception():
+            response, latency = primary.result()
+            return response, model, latency, False
+
+        _LOGGER.info(
+            "[GEMINI] %s did not answer within %ss, hedging to %s",
+            model,
+            self.latency_budget,
+            fallback,
+        )
+        tasks = {
+            asyncio.ensure_future(self._generate(client, fallback, contents, config)): fallback
+        }
+        if primary not in done:
+            tasks[primary] = model
+
+        pending = set(tasks)
+        last_error: BaseException | None = primary.exception() if primary in done else None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception():
+                    last_error = task.exception()
+                    continue
+                for other in pending:
+                    other.cancel()
+                response, latency = task.result()
+                return response, tasks[task], latency, tasks[task] != model
+        raise last_error
+
+    async def _analyze_with_client(
+        self,
+        client: genai.Client,
+        formatted_prompt: str,
+        label: str,
+        video_paths: list[str] | None = None,
+        image: bytes | None = None,
+    ) -> AnalysisResult:
+        """Analyze videos or a snapshot with one API key's client."""
+        if image is not None:
+            # Snapshots are small enough to send inline, without an upload
+            media = [types.Part.from_bytes(data=image, mime_type="image/jpeg")]
+        else:
+            media = list(
+                await asyncio.gather(
+                    *(self._upload_video(client, path, label) for path in video_paths)
+                )
+            )
+
+        # Generate content
+        model = self.select_model(label)
+        _LOGGER.debug("[GEMINI] Generating content with model: %s", model)
+        with span("generate") as record:
+            response, used_model, latency, hedged = await self._generate_hedged(
+                client,
+                model,
+                [types.Content(role="user", parts=media), formatted_prompt],
+                self._generation_config(),
+            )
+            record.update(model=used_model, hedged=hedged)
+        self._stats(used_model).wins += 1
+
+        fields = self._parse_fields(response.text) if self.structured_output else {}
+
+        tokens = None
+        if usage := getattr(response, "usage_metadata", None):
+            tokens = {
+                "input": usage.prompt_token_count or 0,
+                "output": usage.candidates_token_count or 0,
+                "video": _video_tokens(usage),
+            }
 
-            # Upload video file
-            _LOGGER.debug("[GEMINI] Uploading video file")
+        _LOGGER.info("[GEMINI] Successfully analyzed %s", "snapshot" if image else "video")
+        _LOGGER.debug("[GEMINI] Full analysis result: %s", response.text)
+        _LOGGER.debug("[GEMINI] Response metadata: %s", {
+            "model": used_model,
+            "hedged": hedged,
+            "latency": round(latency, 2),
+            "tokens": tokens,
+            "prompt": formatted_prompt,
+            "media": [
+                part.file_data.file_uri if part.file_data else "inline image"
+                for part in media
+            ],
+            "response_length": len(response.text) if response.text else 0
+        })
+
+        return AnalysisResult(
+            # Keep the attribute compact when the answer is structured
+            text=fields.get(ATTR_SUMMARY) or response.text,
+            model=used_model,
+            latency=latency,
+            hedged=hedged,
+            fields=fields,
+            tokens=tokens,
+        )
+
+    async def _upload_video(
+        self, client: genai.Client, video_path: str, label: str
+    ) -> types.Part:
+        """Upload a video and wait until Gemini has processed it."""
+        # Upload video file
+        _LOGGER.debug("[GEMINI] Uploading video file")
+        with span("upload"):
             video_file = await self._run_in_executor(
-                self.client.files.upload,
+                client.files.upload,
                 path=video_path
             )
-            _LOGGER.debug("[GEMINI] Video uploaded: %s", video_file.uri)
+        _LOGGER.debug("[GEMINI] Video uploaded: %s", video_file.uri)
 
-            # Wait for video processing
+        # Wait for video processing
+        with span("processing"):
             while True:
                 video_file = await self._run_in_executor(
-                    self.client.files.get,
+                    client.files.get,
                     name=video_file.name
                 )
                 _LOGGER.debug("[GEMINI] File state: %s", video_file.state)
@@ -127,45 +500,102 @@ class GeminiHandler:
                     _LOGGER.warning("[GEMINI] Unknown file state: %s", video_file.state)
                     await asyncio.sleep(RETRY_DELAY)
 
-            # Generate content
-            _LOGGER.debug("[GEMINI] Generating content with model: %s", MODEL_ID)
-            response = await self._run_in_executor(
-                self.client.models.generate_content,
-                model=MODEL_ID,
-                contents=[
-                    types.Content(
-                        role="user",
-                        parts=[
-                            types.Part.from_uri(
-                                file_uri=video_file.uri,
-                                mime_type=video_file.mime_type
-                            )
-                        ]
-                    ),
-                    formatted_prompt
-                ]
-            )
+        # Sampling rate and offsets are applied by Gemini when tokenizing
+        return types.Part(
+            file_data=types.FileData(
+                file_uri=video_file.uri,
+                mime_type=video_file.mime_type,
+            ),
+            video_metadata=self._video_metadata(label),
+        )
 
-            if not response or not response.text:
-                _LOGGER.error("[GEMINI] Empty response from Gemini API")
-                raise GeminiAPIError("Empty response from Gemini API")
-
-            _LOGGER.info("[GEMINI] Successfully analyzed video")
-            _LOGGER.debug("[GEMINI] Full analysis result: %s", response.text)
-            _LOGGER.debug("[GEMINI] Response metadata: %s", {
-                "model": MODEL_ID,
-                "prompt": formatted_prompt,
-                "video_uri": video_file.uri,
-                "mime_type": video_file.mime_type,
-                "response_length": len(response.text) if response.text else 0
-            })
-            
-            return response.text
+    async def analyze_video(
+        self, video_path: str, prompt: str | None, label: str
+    ) -> AnalysisResult:
+        """Analyze a video using Gemini."""
+        _LOGGER.debug(
+            "[GEMINI] Preparing to analyze video: %s with label: %s",
+            video_path,
+            label,
+        )
+        return await self._analyze(prompt, label, video_paths=[video_path])
+
+    async def analyze_videos(
+        self, video_paths: list[str], prompt: str | None, label: str
+    ) -> AnalysisResult:
+        """Analyze several clips of the same event in one request."""
+        _LOGGER.debug(
+            "[GEMINI] Preparing to analyze %d videos with label: %s",
+            len(video_paths),
+            label,
+        )
+        return await self._analyze(prompt, label, video_paths=video_paths)
+
+    async def analyze_image(
+        self, image: bytes, prompt: str | None, label: str
+    ) -> AnalysisResult:
+        """Analyze a single snapshot using Gemini."""
+        _LOGGER.debug("[GEMINI] Preparing to analyze snapshot with label: %s", label)
+        return await self._analyze(prompt, label, image=image)
+
+    async def _analyze(
+        self,
+        prompt: str | None,
+        label: str,
+        video_paths: list[str] | None = None,
+        image: bytes | None = None,
+    ) -> AnalysisResult:
+        """Run an analysis, moving to another API key on quota errors."""
+        try:
+            await self.async_prepare()
+
+            # Format the prompt
+            if not prompt:
+                _LOGGER.debug("[GEMINI] No custom prompt provided, using default")
+                prompt = DEFAULT_PROMPT
+            formatted_prompt = prompt.format(label=label)
+            _LOGGER.debug("[GEMINI] Using prompt: %s", formatted_prompt)
+
+            attempts = len(self.key_pool)
+            for attempt in range(1, attempts + 1):
+                key = self.key_pool.acquire()
+                _LOGGER.debug("[GEMINI] Using API key %s", key.name)
+                try:
+                    result = await self._analyze_with_client(
+                        key.client, formatted_prompt, label, video_paths, image
+                    )
+                except (GeminiQuotaError, GeminiAuthError) as err:
+                    self.key_pool.release(key, failed=True)
+                    if isinstance(err, GeminiQuotaError):
+                        self.key_pool.bench(key, QUOTA_BENCH_TIME, "quota")
+                    else:
+                        self.key_pool.bench(key, AUTH_BENCH_TIME, "permission")
+                    if attempt == attempts or not self.key_pool.available:
+                        raise
+                    _LOGGER.warning("[GEMINI] Retrying analysis with another API key")
+                    continue
+                except BaseException:
+                    self.key_pool.release(key, failed=True)
+                    raise
+                self.key_pool.release(key)
+                return result
 
         except Exception as err:
-            _LOGGER.error("[GEMINI] Error analyzing video: %s", str(err))
-            raise GeminiAPIError(f"Video analysis failed: {str(err)}")
+            _LOGGER.error("[GEMINI] Error analyzing %s: %s", "snapshot" if image else "video", str(err))
+            raise GeminiAPIError(f"Analysis failed: {str(err)}")
+
+    async def async_diagnostics(self) -> dict[str, Any]:
+        """Return the model, API key and SDK counters."""
+        return {
+            "models": {
+                model: stats.as_dict(model)
+                for model, stats in self.model_stats.items()
+            },
+            "api_keys": self.key_pool.as_dict(),
+            "sdk_timings": self.timings,
+        }
 
     async def close(self):
-        """Close the executor."""
-        self._executor.shutdown(wait=True)
+        """Close the executor without waiting for running SDK calls."""
+        # Calls already running finish in their threads; nothing awaits them
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,114 @@
+"""Pool of Gemini API keys with load balancing."""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from typing import Any, Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+RATE_WINDOW = 60  # seconds
+
+
+class PooledKey:
+    """One API key with its client and usage counters."""
+
+    def __init__(self, index: int, api_key: str, requests_per_minute: int) -> None:
+        """Initialize the key."""
+        self.api_key = api_key
+        self.client: Any = None
+        self.name = f"key_{index} (...{api_key[-4:]})"
+        self.requests_per_minute = requests_per_minute
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.benches = 0
+        self.benched_until = 0.0
+        self.bench_reason: str | None = None
+        self._recent: deque[float] = deque()
+
+    def remaining(self, now: float) -> int:
+        """Return the estimated requests left in the current minute."""
+        while self._recent and self._recent[0] <= now - RATE_WINDOW:
+            self._recent.popleft()
+        return self.requests_per_minute - len(self._recent) - self.in_flight
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        """Return the usage counters."""
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "remaining": self.remaining(now),
+            "benches": self.benches,
+            "benched_for": max(0, round(self.benched_until - now)),
+            "bench_reason": self.bench_reason if self.benched_until > now else None,
+        }
+
+
+class KeyPool:
+    """Spread analyses over several API keys.
+
+    Each analysis leases one key for all of its calls, because files
+    uploaded with a key are only visible to that key's project. The key
+    with the most estimated quota left is chosen; keys that hit quota or
+    permission errors are benched for a while.
+    """
+
+    def __init__(self, api_keys: list[str], requests_per_minute: int) -> None:
+        """Initialize the pool."""
+        self.keys = [
+            PooledKey(index, api_key, requests_per_minute)
+            for index, api_key in enumerate(api_keys, start=1)
+        ]
+
+    def create_clients(self, client_factory: Callable[[str], Any]) -> None:
+        """Build a client for every key. May block; run in an executor."""
+        for key in self.keys:
+            if key.client is None:
+                key.client = client_factory(key.api_key)
+
+    def __len__(self) -> int:
+        """Return the number of keys."""
+        return len(self.keys)
+
+    @property
+    def available(self) -> int:
+        """Return the number of keys that are not benched."""
+        now = time.monotonic()
+        return sum(1 for key in self.keys if key.benched_until <= now)
+
+    def acquire(self) -> PooledKey:
+        """Lease the key with the most quota left."""
+        now = time.monotonic()
+        active = [key for key in self.keys if key.benched_until <= now]
+        if active:
+            key = max(active, key=lambda key: key.remaining(now))
+        else:
+            # Everything is benched; use the key that recovers first
+            key = min(self.keys, key=lambda key: key.benched_until)
+        key.in_flight += 1
+        key.requests += 1
+        key._recent.append(now)
+        return key
+
+    def release(self, key: PooledKey, failed: bool = False) -> None:
+        """Return a leased key."""
+        key.in_flight -= 1
+        if failed:
+            key.failures += 1
+
+    def bench(self, key: PooledKey, seconds: float, reason: str) -> None:
+        """Keep a key out of rotation for a while."""
+        key.benches += 1
+        key.benched_until = time.monotonic() + seconds
+        key.bench_reason = reason
+        _LOGGER.warning(
+            "[GEMINI] Benching API key %s for %ds (%s)", key.name, seconds, reason
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the usage counters of every key."""
+        now = time.monotonic()
+        return {key.name: key.as_dict(now) for key in self.keys}
@@ -3,18 +3,19 @@ from __future__ import annotations
 
 import json
 import logging
-import os
-import tempfile
 import aiofiles
 import aiohttp
 import asyncio
+import inspect
+import time
 from datetime import datetime
 from typing import Any
 
 from homeassistant.components.mqtt import async_subscribe
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.util import dt as dt_util
+from homeassistant.util import dt as dt_util, slugify
 
 from .const import (
     ERROR_GEMINI_API,
@@ -28,12 +29,50 @@ from .const import (
     ATTR_ANALYSIS,
     ATTR_LAST_UPDATED,
     ATTR_DETECTION_TIME,
+    ATTR_MODEL,
+    ATTR_ACTIVITY_SCORE,
+    ATTR_GROUP,
+    ATTR_CAMERAS,
+    ATTR_EVENT_IDS,
+    ATTR_DUPLICATE_OF,
+    ATTR_DUPLICATE_DISTANCE,
+    ATTR_TRACE_ID,
+    ATTR_TOKENS,
+    ATTR_ANALYSIS_ID,
+    DEFAULT_ANALYSIS_ATTRIBUTE,
+    ANALYSIS_ATTRIBUTE_FULL,
+    ANALYSIS_ATTRIBUTE_SUMMARY,
+    ANALYSIS_ATTRIBUTE_UNRECORDED,
+    UNRECORDED_ATTRIBUTES,
+    DEDUP_REUSE,
+    DEFAULT_CORRELATION_WINDOW,
+    DEFAULT_CLIP_PADDING,
+    DEFAULT_MAX_CLIP_DURATION,
+    DEFAULT_CAMERA_PRIORITY,
+    EVENT_ANALYSIS_COMPLETE,
+    GROUP_PROMPT,
+    PRESCREEN_SKIP,
+    PRESCREEN_SNAPSHOT,
 )
 
-from .gemini_handler import GeminiHandler
+from .analysis_store import AnalysisStore, summarize
+from .correlation import EventCorrelator, EventGroup
+from .dedup import DuplicateIndex
+from .gemini_handler import AnalysisResult, GeminiHandler
+from .pipeline import AnalysisJob, AnalysisPipeline
+from .prescreen import PreScreener
+from .readiness import ClipReadiness
+from .spool import ClipSpool
+from .tracing import TraceRecorder, span
 
 _LOGGER = logging.getLogger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Readiness has already waited for the clip, so a failed download is retried
+# once after a short pause instead of backing off
+DOWNLOAD_ATTEMPTS = 2
+DOWNLOAD_RETRY_DELAY = 1  # seconds
+
 class MQTTHandler:
     """Handler for MQTT messages."""
 
@@ -45,6 +84,24 @@ class MQTTHandler:
         cameras: list[str],
         prompt: str,
         gemini_handler: GeminiHandler,
+        pipeline: AnalysisPipeline,
+        spool: ClipSpool,
+        prescreener: PreScreener | None = None,
+        prescreen_threshold: float | None = None,
+        prescreen_action: str = PRESCREEN_SKIP,
+        correlator: EventCorrelator | None = None,
+        correlation_group: str | None = None,
+        correlation_window: float = DEFAULT_CORRELATION_WINDOW,
+        dedup: DuplicateIndex | None = None,
+        dedup_action: str = DEDUP_REUSE,
+        tracer: TraceRecorder | None = None,
+        recording_window: bool = False,
+        clip_padding: float = DEFAULT_CLIP_PADDING,
+        max_clip_duration: float = DEFAULT_MAX_CLIP_DURATION,
+        camera_priority: float = DEFAULT_CAMERA_PRIORITY,
+        label_priorities: dict[str, float] | None = None,
+        analysis_store: AnalysisStore | None = None,
+        analysis_attribute: str = DEFAULT_ANALYSIS_ATTRIBUTE,
     ) -> None:
         """Initialize the MQTT handler."""
         self.hass = hass
@@ -56,9 +113,39 @@ class MQTTHandler:
         self.cameras = cameras
         self.prompt = prompt
         self.gemini_handler = gemini_handler
+        self.pipeline = pipeline
+        self.spool = spool
+        self.prescreener = prescreener
+        self.prescreen_threshold = prescreen_threshold
+        self.prescreen_action = prescreen_action
+        self.correlator = correlator
+        self.correlation_group = correlation_group
+        self.correlation_window = correlation_window
+        self.dedup = dedup
+        self.dedup_action = dedup_action
+        self.tracer = tracer or TraceRecorder(hass)
+        self.recording_window = recording_window
+        self.clip_padding = clip_padding
+        self.max_clip_duration = max_clip_duration
+        self.camera_priority = camera_priority
+        self.label_priorities = label_priorities or {}
+        self.readiness = ClipReadiness(hass)
+        self.analysis_store = analysis_store
+        self.analysis_attribute = analysis_attribute
+        if (
+            analysis_attribute == ANALYSIS_ATTRIBUTE_UNRECORDED
+            and "state_info" not in inspect.signature(hass.states.async_set).parameters
+        ):
+            # Older Home Assistant releases can't leave attributes out of the recorder
+            _LOGGER.warning(
+                "[MQTT] This Home Assistant release records all attributes, "
+                "analysis texts will be saved in history"
+            )
+            self.analysis_attribute = ANALYSIS_ATTRIBUTE_FULL
         self._unsubscribe_events = None
-        self._temp_dir = tempfile.mkdtemp(prefix="frigem_")
-        _LOGGER.debug("[MQTT] Created temporary directory: %s", self._temp_dir)
+        self._accepting = True
+        # A group task is listed under every handler with a member in it
+        self._in_flight: dict[asyncio.Task, AnalysisJob | EventGroup] = {}
 
     async def async_setup(self) -> None:
         """Set up the MQTT handler."""
@@ -72,122 +159,675 @@ class MQTTHandler:
         )
         _LOGGER.debug("[MQTT] Successfully subscribed to MQTT topic")
 
-    async def async_unload(self) -> None:
-        """Unload the MQTT handler."""
+    async def async_unload(self, drain_timeout: float = 0) -> list[AnalysisJob]:
+        """Unload the MQTT handler.
+
+        Intake stops first, then in-flight jobs get up to drain_timeout
+        seconds to finish. Jobs still running after that are cancelled and
+        returned so they can be persisted.
+        """
+        self._accepting = False
         if self._unsubscribe_events:
             self._unsubscribe_events()
             self._unsubscribe_events = None
             _LOGGER.debug("[MQTT] Unsubscribed from MQTT topic")
-            
-        # Clean up temporary directory
-        if os.path.exists(self._temp_dir):
+
+        # Events still waiting for their camera group never started
+        held = self.correlator.async_remove_handler(self) if self.correlator else []
+
+        if not self._in_flight:
+            return held
+
+        _LOGGER.debug(
+            "[MQTT] Draining %d in-flight jobs (timeout %ss)",
+            len(self._in_flight),
+            drain_timeout,
+        )
+        pending = set(self._in_flight)
+        if drain_timeout > 0:
+            _, pending = await asyncio.wait(pending, timeout=drain_timeout)
+        unfinished = []
+        for task in pending:
+            work = self._in_flight[task]
+            if isinstance(work, EventGroup):
+                unfinished.extend(
+                    member.job for member in work.members if member.handler is self
+                )
+            else:
+                unfinished.append(work)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+            _LOGGER.debug("[MQTT] Cancelled %d unfinished jobs", len(pending))
+        return held + unfinished
+
+    async def _download_video(self, video_url: str, key: str) -> str | None:
+        """Download video from URL into the clip spool.
+
+        The returned path is pinned in the spool and must be released.
+        """
+        if cached := await self.spool.async_checkout(key):
+            _LOGGER.debug("[MQTT] Using spooled clip for %s: %s", key, cached)
+            return cached
+
+        # Reserve before opening the request, so waiting for spool space
+        # neither counts against the request timeout nor holds the response open
+        temp_path = await self.spool.async_reserve(key, self.spool.typical_size)
+        downloaded = False
+
+        try:
+            for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+                if attempt > 1:
+                    await asyncio.sleep(DOWNLOAD_RETRY_DELAY)
+                try:
+                    _LOGGER.debug("[MQTT] Downloading video from %s (attempt %d/%d)",
+                                video_url, attempt, DOWNLOAD_ATTEMPTS)
+
+                    async with aiohttp.ClientSession() as session:
+                        async with session.get(video_url, timeout=30) as response:
+                            if response.status == 200:
+                                size = 0
+                                # Use aiofiles for non-blocking file operations
+                                async with aiofiles.open(temp_path, 'wb') as f:
+                                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                                        await f.write(chunk)
+                                        size += len(chunk)
+                                await self.spool.async_commit(temp_path, size)
+                                downloaded = True
+                                _LOGGER.debug("[MQTT] Successfully downloaded video to %s", temp_path)
+                                return temp_path
+                            elif response.status == 404:
+                                _LOGGER.error(
+                                    "[MQTT] Video not found (404). URL: %s",
+                                    video_url
+                                )
+                                return None  # Don't retry on 404
+                            else:
+                                error_content = await response.text()
+                                _LOGGER.warning(
+                                    "[MQTT] Failed to download video on attempt %d, status: %d, URL: %s, Error: %s",
+                                    attempt,
+                                    response.status,
+                                    video_url,
+                                    error_content
+                                )
+
+                except asyncio.TimeoutError:
+                    _LOGGER.warning(
+                        "[MQTT] Timeout downloading video on attempt %d. URL: %s",
+                        attempt,
+                        video_url
+                    )
+
+                except Exception as err:
+                    _LOGGER.error(
+                        "[MQTT] Error downloading video on attempt %d: %s. URL: %s",
+                        attempt,
+                        str(err),
+                        video_url
+                    )
+        finally:
+            if not downloaded:
+                await self.spool.async_release(temp_path, discard=True)
+
+        _LOGGER.error(
+            "[MQTT] Failed to download video after %d attempts. URL: %s",
+            DOWNLOAD_ATTEMPTS,
+            video_url
+        )
+        return None
+
+    async def async_get_event(self, event_id: str) -> dict[str, Any] | None:
+        """Fetch event details from the Frigate HTTP API."""
+        session = async_get_clientsession(self.hass)
+        try:
+            async with session.get(
+                f"{self.frigate_url}/api/events/{event_id}", timeout=10
+            ) as response:
+                if response.status == 200:
+                    return await response.json()
+                _LOGGER.error(
+                    "[MQTT] Failed to fetch event %s, status: %d",
+                    event_id,
+                    response.status,
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            _LOGGER.error("[MQTT] Error fetching event %s: %s", event_id, str(err))
+        return None
+
+    async def async_list_events(
+        self, params: dict[str, Any]
+    ) -> list[dict[str, Any]] | None:
+        """Query the Frigate events API, newest first."""
+        session = async_get_clientsession(self.hass)
+        try:
+            async with session.get(
+                f"{self.frigate_url}/api/events", params=params, timeout=30
+            ) as response:
+                if response.status == 200:
+                    return await response.json()
+                _LOGGER.error(
+                    "[MQTT] Failed to list events, status: %d", response.status
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            _LOGGER.error("[MQTT] Error listing events: %s", str(err))
+        return None
+
+    async def async_run_job(self, job: AnalysisJob) -> AnalysisResult:
+        """Download (if needed) and analyze a single clip."""
+        if job.video_path:
+            return await self._analyze_clip(job, job.video_path)
+
+        with span("download"):
+            temp_path = await self._fetch_clip(job)
+        if not temp_path:
+            raise HomeAssistantError(f"Failed to download the clip of event {job.event_id}")
+
+        try:
+            return await self._analyze_clip(job, temp_path)
+        finally:
+            await self.spool.async_release(temp_path)
+
+    async def _fetch_clip(self, job: AnalysisJob) -> str | None:
+        """Download the clip of an event into the spool.
+
+        With the recording window enabled, only the span from start_time to
+        end_time (plus padding, capped in length) is cut from the camera's
+        recordings, instead of the event clip with Frigate's own pre and
+        post capture. The event clip is the fallback.
+        """
+        event_url = f"{self.frigate_url}/api/events/{job.event_id}/clip.mp4"
+        if (video_url := self._clip_url(job)) != event_url:
+            _LOGGER.debug(
+                "[MQTT] Fetching recordings for %s: %s", job.event_id, video_url
+            )
+            if path := await self._download_video(video_url, f"{job.event_id}@window"):
+                return path
+            _LOGGER.warning(
+                "[MQTT] Could not fetch recordings for %s, using the event clip",
+                job.event_id,
+            )
+
+        _LOGGER.debug("[frigate_gemini] Constructed video URL: %s", event_url)
+        return await self._download_video(event_url, job.event_id)
+
+    def _clip_url(self, job: AnalysisJob) -> str:
+        """Return the URL _fetch_clip downloads first, so readiness probes it."""
+        if self.recording_window and job.start_time and job.end_time:
+            start = job.start_time - self.clip_padding
+            end = min(job.end_time + self.clip_padding, start + self.max_clip_duration)
+            return (
+                f"{self.frigate_url}/api/{job.camera}"
+                f"/start/{start:.1f}/end/{end:.1f}/clip.mp4"
+            )
+        return f"{self.frigate_url}/api/events/{job.event_id}/clip.mp4"
+
+    async def _download_snapshot(self, event_id: str) -> bytes | None:
+        """Download the snapshot of a Frigate event."""
+        session = async_get_clientsession(self.hass)
+        try:
+            async with session.get(
+                f"{self.frigate_url}/api/events/{event_id}/snapshot.jpg", timeout=10
+            ) as response:
+                if response.status == 200:
+                    return await response.read()
+                _LOGGER.error(
+                    "[MQTT] Failed to download snapshot for %s, status: %d",
+                    event_id,
+                    response.status,
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            _LOGGER.error("[MQTT] Error downloading snapshot for %s: %s", event_id, str(err))
+        return None
+
+    async def _snapshot(self, event_id: str) -> bytes | None:
+        """Download the snapshot of a Frigate event as a traced stage."""
+        with span("snapshot"):
+            return await self._download_snapshot(event_id)
+
+    async def _inspect(self, job: AnalysisJob, path: str) -> dict[str, Any]:
+        """Return the local activity scores and hash of a clip, if either is used."""
+        if not self.prescreener or (
+            self.prescreen_threshold is None and self.dedup is None
+        ):
+            return {}
+        with span("inspect"):
+            scores = await self.prescreener.async_inspect(path)
+        if scores is None:
+            return {}
+        _LOGGER.debug("[MQTT] Inspected %s: %s", job.item, scores)
+        if self.prescreen_threshold is None:
+            scores.pop("activity_score")
+        return scores
+
+    def _is_static(self, scores: dict[str, Any]) -> bool:
+        """Return True if a clip scored below the pre-screen threshold."""
+        score = scores.get("activity_score")
+        return score is not None and score < self.prescreen_threshold
+
+    async def _analyze_clip(self, job: AnalysisJob, path: str) -> AnalysisResult:
+        """Pre-screen a clip locally, then analyze the clip or its snapshot."""
+        scores = await self._inspect(job, path)
+        score = scores.get("activity_score")
+
+        if self._is_static(scores):
+            if (
+                self.prescreen_action == PRESCREEN_SNAPSHOT
+                and job.event_id
+                and (image := await self._snapshot(job.event_id))
+            ):
+                _LOGGER.info(
+                    "[MQTT] Low activity (%.4f) in %s, analyzing snapshot instead",
+                    score,
+                    job.item,
+                )
+                result = await self.gemini_handler.analyze_image(
+                    image=image, prompt=self.prompt, label=job.label
+                )
+                result.activity_score = score
+                return result
+
+            _LOGGER.info("[MQTT] Low activity (%.4f) in %s, skipping", score, job.item)
+            return AnalysisResult(
+                text="", model="", latency=0, activity_score=score, skipped=True
+            )
+
+        phash = scores.get("phash") if self.dedup else None
+        # Clips without a Frigate event (files) count as happening now
+        event_time = job.start_time or time.time()
+        if phash and (
+            match := self.dedup.match(job.camera, job.label, phash, event_time)
+        ):
+            previous, distance = match
+            _LOGGER.info(
+                "[MQTT] %s repeats event %s (distance %d), %s",
+                job.item,
+                previous.event_id,
+                distance,
+                "reusing its analysis" if self.dedup_action == DEDUP_REUSE else "skipping",
+            )
+            return AnalysisResult(
+                text=previous.text,
+                model=previous.model,
+                latency=0,
+                fields=dict(previous.fields),
+                activity_score=score,
+                skipped=self.dedup_action != DEDUP_REUSE,
+                duplicate_of=previous.event_id,
+                duplicate_distance=distance,
+            )
+
+        result = await self.gemini_handler.analyze_video(
+            video_path=path,
+            prompt=self.prompt,
+            label=job.label,
+        )
+        result.activity_score = score
+        if phash:
+            self.dedup.add(
+                job.camera,
+                job.label,
+                phash,
+                job.event_id,
+                result.text,
+                result.model,
+                result.fields,
+                event_time,
+            )
+        return result
+
+    def job_priority(self, job: AnalysisJob) -> float:
+        """Return the queue priority of a job from its weights and score.
+
+        Clips without a Frigate score (files passed to the service) are
+        weighted neutrally; they run in the background queue anyway.
+        """
+        score = job.confidence if job.confidence > 0 else 1.0
+        return self.camera_priority * self.label_priorities.get(job.label, 1.0) * score
+
+    async def async_process_job(self, job: AnalysisJob) -> None:
+        """Analyze a live event and publish the result."""
+        job.priority = self.job_priority(job)
+        camera = job.camera
+        label = job.label
+        event_id = job.event_id
+        with self.tracer.trace(camera, label, event_id) as trace:
+            task = asyncio.current_task()
+            self._in_flight[task] = job
             try:
-                # Run blocking operations in executor
-                def cleanup_temp():
-                    for file in os.listdir(self._temp_dir):
-                        file_path = os.path.join(self._temp_dir, file)
-                        if os.path.isfile(file_path):
-                            os.remove(file_path)
-                    os.rmdir(self._temp_dir)
-                
-                await self.hass.async_add_executor_job(cleanup_temp)
-                _LOGGER.debug("[MQTT] Cleaned up temporary directory")
+                # Wait for Frigate to finalize the clip before taking a slot
+                if job.event_id and not job.video_path and not await self.readiness.async_wait(
+                    job, self._clip_url(job)
+                ):
+                    trace.status = "no_clip"
+                    return
+                result = await self.pipeline.async_run(job, self.async_run_job)
             except Exception as err:
-                _LOGGER.error("[MQTT] Error cleaning up temporary directory: %s", str(err))
+                trace.status = "error"
+                _LOGGER.error(
+                    "[frigate_gemini] Error analyzing video for camera %s: %s",
+                    camera,
+                    str(err),
+                )
+                return
+            finally:
+                self._in_flight.pop(task, None)
 
-    async def _download_video(self, video_url: str) -> str | None:
-        """Download video from URL to temporary file."""
-        max_retries = 3
-        retry_delay = 2  # seconds
-        
-        for attempt in range(max_retries):
+            if result.skipped:
+                trace.status = "skipped"
+                return
+
+            _LOGGER.info("[frigate_gemini] Successfully analyzed video for camera %s", camera)
+            _LOGGER.debug("[frigate_gemini] Analysis result: %s", result.text)
+            with span("publish"):
+                self._publish(job, result, {ATTR_TRACE_ID: trace.trace_id})
+
+    def _publish(
+        self,
+        job: AnalysisJob,
+        result: AnalysisResult,
+        extra: dict[str, Any] | None = None,
+        fire_event: bool = True,
+    ) -> None:
+        """Write the result to the camera's sensor and fire the analysis event."""
+        camera = job.camera
+        label = job.label
+        event_id = job.event_id
+        confidence = job.confidence
+        extra = dict(extra or {})
+
+        # Get event end time in local timezone
+        event_time = dt_util.as_local(
+            dt_util.utc_from_timestamp(
+                job.end_time or 0
+            )
+        )
+        formatted_time = event_time.strftime("%I:%M:%S %p")  # e.g., "02:30:45 PM"
+
+        # Keep the full text out of band; a group result is stored once
+        if self.analysis_store and ATTR_ANALYSIS_ID not in extra:
+            extra[ATTR_ANALYSIS_ID] = self.analysis_store.async_add(
+                camera, label, event_id, result.text, result.model, result.fields
+            )
+
+        # Update the sensor state
+        sensor_entity_id = f"sensor.frigem_{camera}"
+        self._async_set_state(
+            sensor_entity_id,
+            f"{label} detected at {formatted_time} ({confidence:.1%} confidence)",
+            {
+                ATTR_CAMERA: camera,
+                ATTR_EVENT_ID: event_id,
+                ATTR_LABEL: label,
+                ATTR_CONFIDENCE: f"{confidence:.1%}",
+                ATTR_CONFIDENCE_RAW: confidence,
+                ATTR_ANALYSIS: self._attribute_text(result.text),
+                ATTR_MODEL: result.model,
+                ATTR_ACTIVITY_SCORE: result.activity_score,
+                ATTR_DUPLICATE_OF: result.duplicate_of,
+                ATTR_DUPLICATE_DISTANCE: result.duplicate_distance,
+                ATTR_TOKENS: result.tokens,
+                **result.fields,
+                **extra,
+                ATTR_LAST_UPDATED: dt_util.now().isoformat(),
+                ATTR_DETECTION_TIME: event_time.isoformat(),
+            },
+        )
+        _LOGGER.debug("[frigate_gemini] Updated sensor state for camera %s: %s", camera, f"{label} detected at {formatted_time} ({confidence:.1%} confidence)")
+
+        if not fire_event:
+            return
+
+        # Fire event for automations
+        self.hass.bus.async_fire(
+            EVENT_ANALYSIS_COMPLETE,
+            {
+                "camera": camera,
+                "event_id": event_id,
+                "label": label,
+                "confidence": f"{confidence:.1%}",
+                "confidence_raw": confidence,
+                "analysis": result.text,
+                "model": result.model,
+                "activity_score": result.activity_score,
+                "duplicate_of": result.duplicate_of,
+                "duplicate_distance": result.duplicate_distance,
+                "tokens": result.tokens,
+                **result.fields,
+                **extra,
+                "detection_time": event_time.isoformat(),
+            },
+        )
+        _LOGGER.debug("[frigate_gemini] Fired analysis complete event for camera %s", camera)
+
+    def _attribute_text(self, text: str) -> str:
+        """Return the analysis text as the sensor attribute should carry it."""
+        if self.analysis_attribute == ANALYSIS_ATTRIBUTE_SUMMARY:
+            return summarize(text)
+        return text
+
+    def _async_set_state(
+        self, entity_id: str, state: str, attributes: dict[str, Any]
+    ) -> None:
+        """Write a sensor state, keeping bulky attributes out of the recorder if asked."""
+        if self.analysis_attribute == ANALYSIS_ATTRIBUTE_UNRECORDED:
+            self.hass.states.async_set(
+                entity_id,
+                state,
+                attributes,
+                state_info={"unrecorded_attributes": UNRECORDED_ATTRIBUTES},
+            )
+        else:
+            self.hass.states.async_set(entity_id, state, attributes)
+
+    async def _run_group(self, group: EventGroup) -> AnalysisResult:
+        """Download the clips of a group and analyze them in one request."""
+        members = group.members
+
+        with span("download"):
+            paths = await asyncio.gather(
+                *(
+                    member.handler._fetch_clip(member.job)  # pylint: disable=protected-access
+                    for member in members
+                ),
+                return_exceptions=True,
+            )
+        clips = []
+        try:
+            for member, path in zip(members, paths):
+                if not isinstance(path, str):
+                    _LOGGER.warning(
+                        "[MQTT] Could not download clip of %s for group %s",
+                        member.job.event_id,
+                        group.group_id,
+                    )
+                    continue
+                scores = await member.handler._inspect(  # pylint: disable=protected-access
+                    member.job, path
+                )
+                if member.handler._is_static(scores):  # pylint: disable=protected-access
+                    _LOGGER.info(
+                        "[MQTT] Low activity (%.4f) in %s, leaving it out of group %s",
+                        scores["activity_score"],
+                        member.job.event_id,
+                        group.group_id,
+                    )
+                    continue
+                clips.append((member, path))
+
+            if not clips:
+                if any(isinstance(path, str) for path in paths):
+                    return AnalysisResult(text="", model="", latency=0, skipped=True)
+                raise HomeAssistantError(
+                    f"Failed to download the clips of group {group.group_id}"
+                )
+
+            cameras = ", ".join(member.job.camera for member, _ in clips)
+            prompt = GROUP_PROMPT.format(
+                count=len(clips), cameras=cameras, prompt=self.prompt
+            )
+            return await self.gemini_handler.analyze_videos(
+                video_paths=[path for _, path in clips],
+                prompt=prompt,
+                label=group.label,
+            )
+        finally:
+            for member, path in zip(members, paths):
+                if isinstance(path, str):
+                    await member.handler.spool.async_release(path)
+
+    async def async_process_group(self, group: EventGroup) -> None:
+        """Analyze correlated events of a camera group together and publish once."""
+        leader = group.members[0].job
+        leader.priority = max(
+            member.handler.job_priority(member.job) for member in group.members
+        )
+        handlers = {member.handler for member in group.members}
+        with self.tracer.trace(leader.camera, group.label, leader.event_id) as trace:
+            task = asyncio.current_task()
+            for handler in handlers:
+                handler._in_flight[task] = group  # pylint: disable=protected-access
             try:
-                # Create a temporary file path
-                temp_path = os.path.join(self._temp_dir, f"{hash(video_url)}.mp4")
-                
-                _LOGGER.debug("[MQTT] Downloading video from %s to %s (attempt %d/%d)", 
-                            video_url, temp_path, attempt + 1, max_retries)
-                
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(video_url, timeout=30) as response:
-                        if response.status == 200:
-                            # Use aiofiles for non-blocking file operations
-                            async with aiofiles.open(temp_path, 'wb') as f:
-                                await f.write(await response.read())
-                            _LOGGER.debug("[MQTT] Successfully downloaded video to %s", temp_path)
-                            return temp_path
-                        elif response.status == 404:
-                            _LOGGER.error(
-                                "[MQTT] Video not found (404). URL: %s",
-                                video_url
-                            )
-                            return None  # Don't retry on 404
-                        elif response.status == 500:
-                            error_content = await response.text()
-                            _LOGGER.warning(
-                                "[MQTT] Server error (500) on attempt %d. URL: %s. Error: %s",
-                                attempt + 1,
-                                video_url,
-                                error_content
-                            )
-                        else:
-                            error_content = await response.text()
-                            _LOGGER.error(
-                                "[MQTT] Failed to download video, status: %d, URL: %s, Error: %s",
-                                response.status,
-                                video_url,
-                                error_content
-                            )
-                
-                if attempt < max_retries - 1:  # Don't sleep on last attempt
-                    await asyncio.sleep(retry_delay * (attempt + 1))  # Exponential backoff
-                
-            except asyncio.TimeoutError:
-                _LOGGER.warning(
-                    "[MQTT] Timeout downloading video on attempt %d. URL: %s",
-                    attempt + 1,
-                    video_url
+                ready = await asyncio.gather(
+                    *(
+                        member.handler.readiness.async_wait(
+                            member.job,
+                            member.handler._clip_url(member.job),  # pylint: disable=protected-access
+                        )
+                        for member in group.members
+                    )
                 )
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(retry_delay * (attempt + 1))
-                    
+                group.members = [
+                    member for member, has_clip in zip(group.members, ready) if has_clip
+                ]
+                if not group.members:
+                    trace.status = "no_clip"
+                    return
+                result = await self.pipeline.async_run(
+                    leader, lambda _job: self._run_group(group)
+                )
+            except asyncio.CancelledError:
+                # One member's entry is unloading and persists its own jobs;
+                # the others still run, so their events are analyzed alone
+                for member in group.members:
+                    if member.handler._accepting:  # pylint: disable=protected-access
+                        await member.handler.async_resume([member.job])
+                raise
             except Exception as err:
+                trace.status = "error"
                 _LOGGER.error(
-                    "[MQTT] Error downloading video on attempt %d: %s. URL: %s",
-                    attempt + 1,
+                    "[frigate_gemini] Error analyzing group %s: %s",
+                    group.group_id,
                     str(err),
-                    video_url
                 )
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(retry_delay * (attempt + 1))
-        
-        _LOGGER.error(
-            "[MQTT] Failed to download video after %d attempts. URL: %s",
-            max_retries,
-            video_url
+                return
+            finally:
+                for handler in handlers:
+                    handler._in_flight.pop(task, None)  # pylint: disable=protected-access
+
+            if result.skipped:
+                trace.status = "skipped"
+                return
+
+            _LOGGER.info("[frigate_gemini] Successfully analyzed group %s", group.group_id)
+            _LOGGER.debug("[frigate_gemini] Analysis result: %s", result.text)
+            with span("publish"):
+                self._publish_group(group, result, trace.trace_id)
+
+    def _publish_group(
+        self, group: EventGroup, result: AnalysisResult, trace_id: str
+    ) -> None:
+        """Write a group result to every member sensor and the group sensor."""
+        leader = group.members[0].job
+        cameras = [member.job.camera for member in group.members]
+        group_attrs = {
+            ATTR_GROUP: group.group_id,
+            ATTR_CAMERAS: cameras,
+            ATTR_EVENT_IDS: [member.job.event_id for member in group.members],
+            ATTR_TRACE_ID: trace_id,
+        }
+        if self.analysis_store:
+            group_attrs[ATTR_ANALYSIS_ID] = self.analysis_store.async_add(
+                cameras,
+                group.label,
+                group_attrs[ATTR_EVENT_IDS],
+                result.text,
+                result.model,
+                result.fields,
+            )
+        # Every camera shows the combined result; automations get one event
+        for member in group.members:
+            if member.handler._accepting:  # pylint: disable=protected-access
+                member.handler._publish(  # pylint: disable=protected-access
+                    member.job, result, group_attrs, fire_event=False
+                )
+        self._async_set_state(
+            # The group name is free text from the options
+            f"sensor.frigem_group_{slugify(group.name)}",
+            f"{group.label} seen by {', '.join(cameras)}",
+            {
+                ATTR_LABEL: group.label,
+                ATTR_ANALYSIS: self._attribute_text(result.text),
+                ATTR_MODEL: result.model,
+                ATTR_TOKENS: result.tokens,
+                **result.fields,
+                **group_attrs,
+                ATTR_LAST_UPDATED: dt_util.now().isoformat(),
+            },
+        )
+        self.hass.bus.async_fire(
+            EVENT_ANALYSIS_COMPLETE,
+            {
+                "camera": leader.camera,
+                "event_id": leader.event_id,
+                "label": group.label,
+                "confidence": f"{leader.confidence:.1%}",
+                "confidence_raw": leader.confidence,
+                "analysis": result.text,
+                "model": result.model,
+                "tokens": result.tokens,
+                **result.fields,
+                **group_attrs,
+                "detection_time": dt_util.as_local(
+                    dt_util.utc_from_timestamp(leader.end_time or 0)
+                ).isoformat(),
+            },
         )
-        return None
+
+    async def async_resume(self, jobs: list[AnalysisJob]) -> None:
+        """Re-queue live jobs left unfinished by a previous unload."""
+        for job in jobs:
+            _LOGGER.debug("[MQTT] Resuming unfinished job for event %s", job.event_id)
+            self.hass.async_create_task(self.async_process_job(job))
 
     async def _handle_event(self, message) -> None:
         """Handle an MQTT message."""
         try:
             payload = json.loads(message.payload)
-            
+            camera = payload.get("after", {}).get("camera")
+
+            # Check if this is a camera we're monitoring
+            if camera not in self.cameras:
+                _LOGGER.debug("[frigate_gemini] Ignoring event for non-monitored camera: %s", camera)
+                return
+
+            # Follow has_clip and end_time through the update stream
+            self.readiness.async_observe(payload.get("after", {}))
+
             # Check if this is an end event
             if not payload.get("type") == "end":
                 _LOGGER.debug("[frigate_gemini] Ignoring non-end event")
                 return
-                
+
             # Log full payload for debugging
             _LOGGER.debug("[frigate_gemini] Received end event payload: %s", payload)
-            
-            camera = payload.get("after", {}).get("camera")
-            
-            # Check if this is a camera we're monitoring
-            if camera not in self.cameras:
-                _LOGGER.debug("[frigate_gemini] Ignoring event for non-monitored camera: %s", camera)
+
+
+            if not self._accepting:
+                _LOGGER.debug("[frigate_gemini] Unloading, ignoring event")
                 return
-                
+
             # Check if analysis is enabled for this camera
             switch_entity_id = f"switch.frigem_analysis_{camera}"
             switch_state = self.hass.states.get(switch_entity_id)
@@ -213,85 +853,27 @@ class MQTTHandler:
                 confidence
             )
 
-            # Construct the video URL using Frigate HTTP API
-            video_url = f"{self.frigate_url}/api/events/{event_id}/clip.mp4"
-            _LOGGER.debug("[frigate_gemini] Constructed video URL: %s", video_url)
-            _LOGGER.debug("[frigate_gemini] Frigate base URL: %s", self.frigate_url)
-            _LOGGER.debug("[frigate_gemini] Event ID: %s", event_id)
+            job = AnalysisJob(
+                camera=camera,
+                label=label,
+                event_id=event_id,
+                confidence=confidence,
+                start_time=payload.get("after", {}).get("start_time"),
+                end_time=payload.get("after", {}).get("end_time"),
+            )
 
-            # Download video
-            temp_path = await self._download_video(video_url)
-            if not temp_path:
-                _LOGGER.error("[frigate_gemini] Failed to download video from %s", video_url)
+            if self.correlator and self.correlation_group:
+                # Wait for overlapping events from the other cameras of the group
+                self.correlator.async_add(
+                    self.correlation_group,
+                    self.correlation_window,
+                    self,
+                    job,
+                )
                 return
 
-            try:
-                analysis = await self.gemini_handler.analyze_video(
-                    video_path=temp_path,
-                    prompt=self.prompt,
-                    label=label
-                )
-                
-                _LOGGER.info("[frigate_gemini] Successfully analyzed video for camera %s", camera)
-                _LOGGER.debug("[frigate_gemini] Analysis result: %s", analysis)
+            await self.async_process_job(job)
 
-                # Get event end time in local timezone
-                event_time = dt_util.as_local(
-                    dt_util.utc_from_timestamp(
-                        payload.get("after", {}).get("end_time", 0)
-                    )
-                )
-                formatted_time = event_time.strftime("%I:%M:%S %p")  # e.g., "02:30:45 PM"
-
-                # Update the sensor state
-                sensor_entity_id = f"sensor.frigem_{camera}"
-                self.hass.states.async_set(
-                    sensor_entity_id,
-                    f"{label} detected at {formatted_time} ({confidence:.1%} confidence)",
-                    {
-                        ATTR_CAMERA: camera,
-                        ATTR_EVENT_ID: event_id,
-                        ATTR_LABEL: label,
-                        ATTR_CONFIDENCE: f"{confidence:.1%}",
-                        ATTR_CONFIDENCE_RAW: confidence,
-                        ATTR_ANALYSIS: analysis,
-                        ATTR_LAST_UPDATED: dt_util.now().isoformat(),
-                        ATTR_DETECTION_TIME: event_time.isoformat(),
-                    },
-                )
-
-                # Fire event for automations
-                self.hass.bus.async_fire(
-                    "frigate_gemini_analysis_complete",
-                    {
-                        "camera": camera,
-                        "event_id": event_id,
-                        "label": label,
-                        "confidence": f"{confidence:.1%}",
-                        "confidence_raw": confidence,
-                        "analysis": analysis,
-                        "detection_time": event_time.isoformat(),
-                    },
-                )
-                
-                _LOGGER.debug("[frigate_gemini] Updated sensor state for camera %s: %s", camera, f"{label} detected at {formatted_time} ({confidence:.1%} confidence)")
-                _LOGGER.debug("[frigate_gemini] Fired analysis complete event for camera %s", camera)
-                
-            except Exception as err:
-                _LOGGER.error(
-                    "[frigate_gemini] Error analyzing video for camera %s: %s",
-                    camera,
-                    str(err),
-                )
-            finally:
-                # Clean up temporary file
-                try:
-                    # Run blocking operations in executor
-                    await self.hass.async_add_executor_job(os.remove, temp_path)
-                    _LOGGER.debug("[MQTT] Cleaned up temporary file: %s", temp_path)
-                except Exception as err:
-                    _LOGGER.error("[MQTT] Error cleaning up temporary file: %s", str(err))
-                
         except json.JSONDecodeError as err:
             _LOGGER.error("[frigate_gemini] Error decoding MQTT message: %s", str(err))
         except Exception as err:
@@ -0,0 +1,268 @@
+"""Bounded analysis pipeline shared by live events and service calls."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .const import (
+    BACKGROUND_RESERVED_SLOTS,
+    DEFAULT_MAX_PARALLEL,
+    PRIORITY_AGING_RATE,
+    SIGNAL_PROGRESS,
+)
+from .tracing import span
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class AnalysisJob:
+    """A single clip waiting to be analysed."""
+
+    camera: str
+    label: str
+    event_id: str | None = None
+    video_path: str | None = None
+    confidence: float = 0.0
+    start_time: float | None = None
+    end_time: float | None = None
+    priority: float = 1.0
+
+    @property
+    def item(self) -> str:
+        """Return the identifier the caller used for this clip."""
+        return self.video_path or self.event_id or ""
+
+
+JobRunner = Callable[[AnalysisJob], Awaitable[Any]]
+
+
+class AnalysisProgress:
+    """Track bulk analysis progress for one config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the progress tracker."""
+        self.hass = hass
+        self.entry_id = entry_id
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+
+    @property
+    def percent(self) -> int:
+        """Return the share of finished items."""
+        if not self.total:
+            return 100
+        return int((self.completed + self.failed) * 100 / self.total)
+
+    @callback
+    def async_begin(self, count: int) -> None:
+        """Register a new batch, resetting counters if the last one finished."""
+        if self.running == 0 and self.completed + self.failed >= self.total:
+            self.total = self.completed = self.failed = 0
+        self.total += count
+        self._async_update()
+
+    @callback
+    def async_item_started(self) -> None:
+        """Mark one item as running."""
+        self.running += 1
+        self._async_update()
+
+    @callback
+    def async_item_finished(self, success: bool) -> None:
+        """Mark one item as done."""
+        self.running -= 1
+        if success:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self._async_update()
+
+    @callback
+    def _async_update(self) -> None:
+        """Notify the progress sensor."""
+        async_dispatcher_send(
+            self.hass, SIGNAL_PROGRESS.format(entry_id=self.entry_id)
+        )
+
+
+@dataclass(order=True)
+class _Waiter:
+    """A job waiting for a pipeline slot, ordered by aged priority."""
+
+    sort_key: tuple[float, int]
+    job: AnalysisJob = field(compare=False)
+    enqueued: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AnalysisPipeline:
+    """Limit how many clips are analysed at the same time.
+
+    Waiting jobs are started highest priority first. A job's priority grows
+    by PRIORITY_AGING_RATE for every second it waits, so low-priority work
+    is delayed under load but never starved. Background jobs (backfill)
+    only start while no live job is waiting and at least one slot stays
+    free for live events, so with a single slot they never start.
+    """
+
+    def __init__(self, max_parallel: int = DEFAULT_MAX_PARALLEL) -> None:
+        """Initialize the pipeline."""
+        self.max_parallel = max_parallel
+        self.running = 0
+        self._live: list[_Waiter] = []
+        self._background: list[_Waiter] = []
+        self._sequence = itertools.count()
+
+    @property
+    def background_slots(self) -> int:
+        """Return how many slots background jobs may use at once."""
+        return max(0, self.max_parallel - BACKGROUND_RESERVED_SLOTS)
+
+    def _enqueue(self, job: AnalysisJob, background: bool) -> _Waiter:
+        """Queue a job for a slot."""
+        now = time.monotonic()
+        # Aging adds the same amount to every waiter per second, so ordering
+        # by priority minus enqueue time times the rate stays valid over time
+        waiter = _Waiter(
+            (-(job.priority - now * PRIORITY_AGING_RATE), next(self._sequence)),
+            job,
+            now,
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._background if background else self._live, waiter)
+        return waiter
+
+    def _dispatch(self) -> None:
+        """Hand free slots to the best waiting jobs."""
+        for queue, limit in (
+            (self._live, self.max_parallel),
+            (self._background, self.background_slots),
+        ):
+            while queue and self.running < limit:
+                if queue is self._background and self._live:
+                    return
+                waiter = heapq.heappop(queue)
+                if waiter.future.done():  # Cancelled while waiting
+                    continue
+                self.running += 1
+                waiter.future.set_result(None)
+
+    def _release(self) -> None:
+        """Free a slot and start the next job."""
+        self.running -= 1
+        self._dispatch()
+
+    async def async_run(
+        self, job: AnalysisJob, runner: JobRunner, background: bool = False
+    ) -> Any:
+        """Run a single job once a pipeline slot is free."""
+        with span("queue") as record:
+            waiter = self._enqueue(job, background)
+            self._dispatch()
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # The slot was granted just before the cancellation
+                    self._release()
+                else:
+                    waiter.future.cancel()
+                raise
+            record["priority"] = round(job.priority, 3)
+
+        _LOGGER.debug(
+            "[PIPELINE] Running %s for camera %s after %.1fs (priority %.2f, %d/%d slots busy)",
+            job.item,
+            job.camera,
+            time.monotonic() - waiter.enqueued,
+            job.priority,
+            self.running,
+            self.max_parallel,
+        )
+        try:
+            return await runner(job)
+        finally:
+            self._release()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the current load of the pipeline."""
+        now = time.monotonic()
+        waiting = [
+            waiter
+            for waiter in self._live + self._background
+            if not waiter.future.done()
+        ]
+        return {
+            "max_parallel": self.max_parallel,
+            "running": self.running,
+            "waiting_live": sum(1 for waiter in self._live if not waiter.future.done()),
+            "waiting_background": sum(
+                1 for waiter in self._background if not waiter.future.done()
+            ),
+            "longest_wait": round(
+                max((now - waiter.enqueued for waiter in waiting), default=0), 1
+            ),
+        }
+
+    async def async_run_batch(
+        self,
+        jobs: list[AnalysisJob],
+        runner: JobRunner,
+        max_parallel: int,
+        progress: AnalysisProgress | None = None,
+        background: bool = True,
+    ) -> list[dict[str, Any]]:
+        """Run many jobs, at most max_parallel of them at once, in input order.
+
+        Batches wait behind live events unless background is False.
+        """
+        limit = asyncio.Semaphore(max_parallel)
+        if progress:
+            progress.async_begin(len(jobs))
+
+        async def _run_one(job: AnalysisJob) -> dict[str, Any]:
+            async with limit:
+                if progress:
+                    progress.async_item_started()
+                try:
+                    result = await self.async_run(job, runner, background)
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.error(
+                        "[PIPELINE] Error analyzing %s: %s", job.item, str(err)
+                    )
+                    if progress:
+                        progress.async_item_finished(False)
+                    return {"item": job.item, "status": "error", "error": str(err)}
+                if progress:
+                    progress.async_item_finished(True)
+                if result.skipped:
+                    return {
+                        "item": job.item,
+                        "status": "skipped",
+                        "activity_score": result.activity_score,
+                        "duplicate_of": result.duplicate_of,
+                    }
+                return {
+                    "item": job.item,
+                    "status": "ok",
+                    "label": job.label,
+                    "analysis": result.text,
+                    "model": result.model,
+                    "activity_score": result.activity_score,
+                    "duplicate_of": result.duplicate_of,
+                    "tokens": result.tokens,
+                    **result.fields,
+                }
+
+        return list(await asyncio.gather(*(_run_one(job) for job in jobs)))
@@ -0,0 +1,147 @@
+"""Local inspection of clips before they are sent to Gemini."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+SAMPLE_FRAMES = 16  # Frames compared per clip
+MIN_KEYFRAMES = 4  # Below this, decode every frame instead of keyframes only
+SAMPLE_WIDTH = 160  # Frames are scaled down to this width before comparing
+PIXEL_THRESHOLD = 25  # Grey-level change that counts as motion (0-255)
+HASH_SIZE = 8  # Scene and subject hashes of HASH_SIZE x HASH_SIZE bits each
+PROCESS_WORKERS = 2
+
+
+def inspect_clip(path: str) -> dict[str, Any] | None:
+    """Score how much a clip changes between sampled frames and hash the scene.
+
+    Runs in a worker process. Each frame has its mean brightness removed, so
+    global lighting changes don't count as motion. The perceptual hash joins
+    two difference hashes: one of the per-pixel median of the sampled frames
+    (the static scene) and one of the region around whatever differs most
+    from it (the subject), so two events in front of the same background
+    don't hash alike. Returns None if the decoder or NumPy isn't installed.
+    """
+    try:
+        import av  # pylint: disable=import-outside-toplevel
+        import numpy as np  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    def _decode(keyframes_only: bool) -> list:
+        with av.open(path) as container:
+            stream = container.streams.video[0]
+            if keyframes_only:
+                stream.codec_context.skip_frame = "NONKEY"
+            height = max(
+                1, round(SAMPLE_WIDTH * stream.codec_context.height / stream.codec_context.width)
+            )
+            return [
+                frame.reformat(width=SAMPLE_WIDTH, height=height, format="gray").to_ndarray()
+                for frame in container.decode(stream)
+            ]
+
+    frames = _decode(keyframes_only=True)
+    if len(frames) < MIN_KEYFRAMES:
+        frames = _decode(keyframes_only=False)
+    if not frames:
+        return {"activity_score": 0.0, "frame_diff": 0.0, "frames": 0, "phash": None}
+
+    # Evenly spaced sample of at most SAMPLE_FRAMES frames
+    index = np.linspace(0, len(frames) - 1, min(SAMPLE_FRAMES, len(frames))).astype(int)
+    stack = np.stack([frames[i] for i in index]).astype(np.float32)
+
+    def _dhash(image) -> str:
+        # Difference hash: shrink to (HASH_SIZE + 1) x HASH_SIZE block means
+        # and compare horizontal neighbours
+        blocks = np.array(
+            [
+                [block.mean() for block in np.array_split(band, HASH_SIZE + 1, axis=1)]
+                for band in np.array_split(image, HASH_SIZE, axis=0)
+            ]
+        )
+        bits = (blocks[:, 1:] > blocks[:, :-1]).flatten()
+        return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}"
+
+    scene = np.median(stack, axis=0)
+
+    # The subject is the sampled frame that differs most from the scene,
+    # cropped with a margin to the pixels that differ. Without motion the
+    # foreground half is zero and only the scene is compared.
+    moving = np.abs(stack - scene) > PIXEL_THRESHOLD
+    counts = moving.sum(axis=(1, 2))
+    foreground = "0" * (HASH_SIZE * HASH_SIZE // 4)
+    if counts.max() > 0:
+        peak = int(counts.argmax())
+        rows = np.flatnonzero(moving[peak].any(axis=1))
+        cols = np.flatnonzero(moving[peak].any(axis=0))
+        height, width = scene.shape
+        margin_y = max(HASH_SIZE, (rows[-1] - rows[0]) // 4)
+        margin_x = max(HASH_SIZE + 1, (cols[-1] - cols[0]) // 4)
+        foreground = _dhash(
+            stack[peak][
+                max(0, rows[0] - margin_y) : min(height, rows[-1] + margin_y + 1),
+                max(0, cols[0] - margin_x) : min(width, cols[-1] + margin_x + 1),
+            ]
+        )
+    phash = _dhash(scene) + foreground
+
+    if len(index) < 2:
+        return {"activity_score": 0.0, "frame_diff": 0.0, "frames": 1, "phash": phash}
+
+    stack -= stack.mean(axis=(1, 2), keepdims=True)
+
+    diffs = np.abs(np.diff(stack, axis=0))
+    frame_diff = diffs.mean(axis=(1, 2)) / 255
+    motion_energy = (diffs > PIXEL_THRESHOLD).mean(axis=(1, 2))
+
+    return {
+        "activity_score": round(float(motion_energy.max()), 4),
+        "frame_diff": round(float(frame_diff.mean()), 4),
+        "frames": int(len(index)),
+        "phash": phash,
+    }
+
+
+class PreScreener:
+    """Run clip inspection in a shared process pool, off the event loop."""
+
+    def __init__(self) -> None:
+        """Initialize the pre-screener; the pool starts on first use."""
+        self._pool: ProcessPoolExecutor | None = None
+        self._unavailable = False
+
+    async def async_inspect(self, path: str) -> dict[str, Any] | None:
+        """Return the activity scores and hash of a clip, or None if unavailable."""
+        if self._unavailable:
+            return None
+        if self._pool is None:
+            # Spawn, since forking a threaded Home Assistant process is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        try:
+            scores = await asyncio.get_running_loop().run_in_executor(
+                self._pool, inspect_clip, path
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("[PRESCREEN] Could not inspect %s: %s", path, str(err))
+            return None
+        if scores is None:
+            _LOGGER.warning(
+                "[PRESCREEN] PyAV or NumPy is not installed, clip inspection disabled"
+            )
+            self._unavailable = True
+        return scores
+
+    def shutdown(self) -> None:
+        """Stop the worker processes without waiting."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
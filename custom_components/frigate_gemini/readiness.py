@@ -0,0 +1,178 @@
+"""Tracking of when Frigate has finalized event clips."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    CLIP_PROBE_INTERVAL,
+    CLIP_PROBE_MAX_INTERVAL,
+    CLIP_READY_TIMEOUT,
+    TRACKED_EVENTS_LIMIT,
+)
+from .pipeline import AnalysisJob
+from .tracing import span
+
+_LOGGER = logging.getLogger(__name__)
+
+DELAY_SMOOTHING = 0.3  # Weight of the newest delay in the running average
+EARLY_PROBE_FACTOR = 0.8  # Probe first a little before the expected delay
+
+
+class ClipDelayStats:
+    """Clip finalization delays observed for one camera."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.clips = 0
+        self.probes = 0
+        self.timeouts = 0
+        self.no_clip = 0
+        self.average_delay: float | None = None
+        self.last_delay: float | None = None
+        self.max_delay = 0.0
+
+    def record(self, delay: float | None, probes: int) -> None:
+        """Record a clip that became ready."""
+        self.clips += 1
+        self.probes += probes
+        if delay is None:
+            return
+        delay = max(0.0, delay)
+        self.last_delay = delay
+        self.max_delay = max(self.max_delay, delay)
+        self.average_delay = (
+            delay
+            if self.average_delay is None
+            else DELAY_SMOOTHING * delay + (1 - DELAY_SMOOTHING) * self.average_delay
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters."""
+        return {
+            "clips": self.clips,
+            "probes": self.probes,
+            "timeouts": self.timeouts,
+            "no_clip": self.no_clip,
+            "average_delay": round(self.average_delay, 2)
+            if self.average_delay is not None
+            else None,
+            "last_delay": round(self.last_delay, 2)
+            if self.last_delay is not None
+            else None,
+            "max_delay": round(self.max_delay, 2),
+        }
+
+
+class ClipReadiness:
+    """Wait until Frigate has finalized the clip of an ended event.
+
+    has_clip and end_time are taken from the MQTT event stream. The first
+    probe is scheduled for when the camera's clips have usually been ready,
+    and cheap HEAD requests then poll until the clip can be served.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self._events: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._stats: dict[str, ClipDelayStats] = {}
+        self._head_supported = True
+
+    def _camera_stats(self, camera: str) -> ClipDelayStats:
+        """Return the counters of a camera."""
+        return self._stats.setdefault(camera, ClipDelayStats())
+
+    @callback
+    def async_observe(self, event: dict[str, Any]) -> None:
+        """Remember the clip state reported in an MQTT event message."""
+        if not (event_id := event.get("id")):
+            return
+        self._events[event_id] = {
+            "has_clip": event.get("has_clip"),
+            "end_time": event.get("end_time"),
+        }
+        self._events.move_to_end(event_id)
+        while len(self._events) > TRACKED_EVENTS_LIMIT:
+            self._events.popitem(last=False)
+
+    async def _probe(self, url: str) -> bool:
+        """Return True if Frigate serves the clip now."""
+        session = async_get_clientsession(self.hass)
+        try:
+            if self._head_supported:
+                async with session.head(url, timeout=5) as response:
+                    if response.status not in (405, 501):
+                        return response.status == 200
+                _LOGGER.debug("[READY] Frigate does not answer HEAD, probing with GET")
+                self._head_supported = False
+            # One byte is enough to know the clip can be served
+            async with session.get(
+                url, headers={"Range": "bytes=0-0"}, timeout=10
+            ) as response:
+                return response.status in (200, 206)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            _LOGGER.debug("[READY] Probe of %s failed: %s", url, str(err))
+            return False
+
+    async def async_wait(self, job: AnalysisJob, url: str) -> bool:
+        """Wait until the clip at url is ready; False if it will never exist.
+
+        url is the clip that will be downloaded: the event clip or the
+        recordings window.
+        """
+        info = self._events.pop(job.event_id, {})
+        stats = self._camera_stats(job.camera)
+        if info.get("has_clip") is False:
+            stats.no_clip += 1
+            _LOGGER.info("[READY] Event %s has no clip", job.event_id)
+            return False
+
+        end_time = job.end_time or info.get("end_time")
+        with span("clip_ready") as record:
+            if end_time and stats.average_delay:
+                first_probe = end_time + stats.average_delay * EARLY_PROBE_FACTOR
+                if (wait := first_probe - time.time()) > 0:
+                    await asyncio.sleep(min(wait, CLIP_READY_TIMEOUT))
+
+            deadline = time.monotonic() + CLIP_READY_TIMEOUT
+            interval = CLIP_PROBE_INTERVAL
+            probes = 0
+            while True:
+                probes += 1
+                if await self._probe(url):
+                    delay = time.time() - end_time if end_time else None
+                    stats.record(delay, probes)
+                    record.update(probes=probes, delay=delay and round(delay, 2))
+                    _LOGGER.debug(
+                        "[READY] Clip of %s ready after %d probes (%s s after end)",
+                        job.event_id,
+                        probes,
+                        f"{delay:.1f}" if delay is not None else "?",
+                    )
+                    return True
+                if (remaining := deadline - time.monotonic()) <= 0:
+                    break
+                await asyncio.sleep(min(interval, remaining))
+                interval = min(interval * 2, CLIP_PROBE_MAX_INTERVAL)
+
+            stats.timeouts += 1
+            record["probes"] = probes
+            _LOGGER.warning(
+                "[READY] Clip of %s not ready after %ss, trying to download anyway",
+                job.event_id,
+                CLIP_READY_TIMEOUT,
+            )
+            return True
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the per-camera finalization delays."""
+        return {camera: stats.as_dict() for camera, stats in self._stats.items()}
@@ -10,7 +10,9 @@ from homeassistant.components.sensor import (
     SensorDeviceClass,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import PERCENTAGE
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
@@ -21,6 +23,11 @@ from .const import (
     STATE_NO_DETECTION,
     ATTR_CAMERA,
     ATTR_LAST_UPDATED,
+    ATTR_TOTAL,
+    ATTR_COMPLETED,
+    ATTR_FAILED,
+    ATTR_RUNNING,
+    SIGNAL_PROGRESS,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -39,6 +46,7 @@ async def async_setup_entry(
     for camera in cameras:
         _LOGGER.debug("[SENSOR] Creating sensor for camera: %s", camera)
         entities.append(FrigateGeminiSensor(hass, config_entry, camera))
+        entities.append(FrigateGeminiProgressSensor(config_entry, camera))
 
     if entities:
         async_add_entities(entities)
@@ -109,3 +117,55 @@ class FrigateGeminiSensor(SensorEntity):
                 ATTR_LAST_UPDATED: datetime.utcnow().isoformat(),
             },
         )
+
+
+class FrigateGeminiProgressSensor(SensorEntity):
+    """Progress of bulk analyze_video calls for a camera."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_icon = "mdi:progress-clock"
+
+    def __init__(self, config_entry: ConfigEntry, camera: str) -> None:
+        """Initialize the sensor."""
+        self.config_entry = config_entry
+        self.camera = camera
+        self._attr_unique_id = f"frigem_{camera}_progress"
+        self.entity_id = f"sensor.frigem_{camera}_progress"
+        self._attr_name = f"FriGem {camera} analysis progress"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"frigem_{camera}")},
+        )
+
+    @property
+    def _progress(self):
+        """Return the entry's progress tracker."""
+        return self.hass.data[DOMAIN][self.config_entry.entry_id]["progress"]
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the share of finished items."""
+        return self._progress.percent
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the batch counters."""
+        progress = self._progress
+        return {
+            ATTR_CAMERA: self.camera,
+            ATTR_TOTAL: progress.total,
+            ATTR_COMPLETED: progress.completed,
+            ATTR_FAILED: progress.failed,
+            ATTR_RUNNING: progress.running,
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to progress updates."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_PROGRESS.format(entry_id=self.config_entry.entry_id),
+                self.async_write_ha_state,
+            )
+        )
@@ -0,0 +1,284 @@
+"""Services for the FriGem integration."""
+from __future__ import annotations
+
+import glob
+import logging
+import os
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    ATTR_ANALYSIS_ID,
+    ATTR_CAMERA,
+    ATTR_EVENT_ID,
+    ATTR_END_TIME,
+    ATTR_LABEL,
+    ATTR_LABELS,
+    ATTR_MAX_PARALLEL,
+    ATTR_RATE,
+    ATTR_START_TIME,
+    ATTR_VIDEO_PATH,
+    BACKGROUND_RESERVED_SLOTS,
+    DATA_ANALYSES,
+    DATA_PIPELINE,
+    DEFAULT_BACKFILL_RATE,
+    DEFAULT_LABEL,
+    ERROR_INVALID_PATH,
+    MAX_BACKFILL_RATE,
+    MAX_PARALLEL_LIMIT,
+    SERVICE_ANALYZE_VIDEO,
+    SERVICE_BACKFILL,
+    SERVICE_CANCEL_BACKFILL,
+    SERVICE_GET_ANALYSIS,
+)
+from .pipeline import AnalysisJob, AnalysisPipeline
+
+_LOGGER = logging.getLogger(__name__)
+
+GLOB_CHARS = ("*", "?", "[")
+
+SERVICE_ANALYZE_VIDEO_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_CAMERA): cv.string,
+            vol.Optional(ATTR_VIDEO_PATH): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_EVENT_ID): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_LABEL, default=DEFAULT_LABEL): cv.string,
+            vol.Optional(ATTR_MAX_PARALLEL): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=MAX_PARALLEL_LIMIT)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_VIDEO_PATH, ATTR_EVENT_ID),
+)
+
+SERVICE_BACKFILL_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CAMERA): cv.string,
+        vol.Required(ATTR_START_TIME): cv.datetime,
+        vol.Optional(ATTR_END_TIME): cv.datetime,
+        vol.Optional(ATTR_LABELS, default=[]): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_RATE, default=DEFAULT_BACKFILL_RATE): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_BACKFILL_RATE)
+        ),
+    }
+)
+
+SERVICE_CANCEL_BACKFILL_SCHEMA = vol.Schema({vol.Required(ATTR_CAMERA): cv.string})
+
+SERVICE_GET_ANALYSIS_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_ANALYSIS_ID): cv.string,
+            vol.Optional(ATTR_CAMERA): cv.string,
+            vol.Optional(ATTR_EVENT_ID): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_ANALYSIS_ID, ATTR_CAMERA, ATTR_EVENT_ID),
+)
+
+
+def _get_entry_data(hass: HomeAssistant, camera: str) -> dict[str, Any]:
+    """Return the handlers of the entry monitoring a camera."""
+    for data in hass.data.get(DOMAIN, {}).values():
+        if not isinstance(data, dict) or "mqtt_handler" not in data:
+            continue
+        if camera in data["mqtt_handler"].cameras:
+            return data
+    raise HomeAssistantError(f"Camera {camera} is not configured in FriGem")
+
+
+def _expand_paths(patterns: list[str]) -> list[str]:
+    """Expand glob patterns, keeping plain paths as given."""
+    paths: list[str] = []
+    for pattern in patterns:
+        if any(char in pattern for char in GLOB_CHARS):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                _LOGGER.warning("[SERVICE] No files match pattern: %s", pattern)
+            paths.extend(matches)
+        else:
+            paths.append(pattern)
+    return paths
+
+
+async def _async_build_jobs(
+    hass: HomeAssistant, call: ServiceCall, mqtt_handler
+) -> tuple[list[AnalysisJob], list[dict[str, Any]]]:
+    """Turn service data into jobs, collecting items that can't be run."""
+    camera = call.data[ATTR_CAMERA]
+    label = call.data[ATTR_LABEL]
+    jobs: list[AnalysisJob] = []
+    rejected: list[dict[str, Any]] = []
+
+    paths = await hass.async_add_executor_job(
+        _expand_paths, call.data.get(ATTR_VIDEO_PATH, [])
+    )
+    for path in paths:
+        if not hass.config.is_allowed_path(path) or not await hass.async_add_executor_job(
+            os.path.isfile, path
+        ):
+            rejected.append({"item": path, "status": "error", "error": ERROR_INVALID_PATH})
+            continue
+        jobs.append(AnalysisJob(camera=camera, label=label, video_path=path))
+
+    for event_id in call.data.get(ATTR_EVENT_ID, []):
+        event = await mqtt_handler.async_get_event(event_id)
+        jobs.append(
+            AnalysisJob(
+                camera=camera,
+                label=(event or {}).get("label") or label,
+                event_id=event_id,
+                confidence=(event or {}).get("top_score") or 0.0,
+                start_time=(event or {}).get("start_time"),
+                end_time=(event or {}).get("end_time"),
+            )
+        )
+
+    for job in jobs:
+        job.priority = mqtt_handler.job_priority(job)
+    return jobs, rejected
+
+
+def _check_background_slots(pipeline: AnalysisPipeline) -> None:
+    """Raise if background work could never start without delaying live events."""
+    if not pipeline.background_slots:
+        raise HomeAssistantError(
+            "Batches and backfill leave one analysis slot to live events and "
+            f"need max_parallel of at least {BACKGROUND_RESERVED_SLOTS + 1}; "
+            "raise max_parallel in configuration.yaml"
+        )
+
+
+async def _async_analyze_video(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Analyze one or more clips and return the results."""
+    data = _get_entry_data(hass, call.data[ATTR_CAMERA])
+    mqtt_handler = data["mqtt_handler"]
+    pipeline = hass.data[DOMAIN][DATA_PIPELINE]
+
+    max_parallel = call.data.get(ATTR_MAX_PARALLEL, pipeline.max_parallel)
+    if max_parallel > pipeline.max_parallel:
+        raise HomeAssistantError(
+            f"max_parallel {max_parallel} exceeds the pipeline limit of "
+            f"{pipeline.max_parallel}; raise max_parallel in configuration.yaml"
+        )
+
+    _check_background_slots(pipeline)
+    jobs, rejected = await _async_build_jobs(hass, call, mqtt_handler)
+    _LOGGER.debug(
+        "[SERVICE] Analyzing %d clips for camera %s (%d rejected)",
+        len(jobs),
+        call.data[ATTR_CAMERA],
+        len(rejected),
+    )
+
+    results = await pipeline.async_run_batch(
+        jobs,
+        mqtt_handler.async_run_job,
+        max_parallel,
+        data["progress"],
+    )
+    results.extend(rejected)
+
+    succeeded = sum(1 for result in results if result["status"] == "ok")
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+async def _async_backfill(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Start a historical backfill for a camera."""
+    camera = call.data[ATTR_CAMERA]
+    data = _get_entry_data(hass, camera)
+
+    start_time = dt_util.as_timestamp(dt_util.as_utc(call.data[ATTR_START_TIME]))
+    end_time = dt_util.as_timestamp(
+        dt_util.as_utc(call.data.get(ATTR_END_TIME) or dt_util.utcnow())
+    )
+    if start_time >= end_time:
+        raise HomeAssistantError("Backfill start_time must be before end_time")
+    _check_background_slots(hass.data[DOMAIN][DATA_PIPELINE])
+
+    await data["backfill"].async_start(
+        camera,
+        start_time,
+        end_time,
+        call.data[ATTR_LABELS],
+        call.data[ATTR_RATE],
+    )
+
+
+def _get_analysis(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return the full text of a stored analysis."""
+    store = hass.data[DOMAIN][DATA_ANALYSES]
+    if analysis_id := call.data.get(ATTR_ANALYSIS_ID):
+        record = store.get(analysis_id)
+    else:
+        record = store.find(call.data.get(ATTR_CAMERA), call.data.get(ATTR_EVENT_ID))
+    if record is None:
+        raise HomeAssistantError("No stored analysis matches the request")
+    return dict(record)
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the FriGem services."""
+    if hass.services.has_service(DOMAIN, SERVICE_ANALYZE_VIDEO):
+        return
+
+    async def async_analyze_video(call: ServiceCall) -> ServiceResponse:
+        """Handle the analyze_video service call."""
+        return await _async_analyze_video(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ANALYZE_VIDEO,
+        async_analyze_video,
+        schema=SERVICE_ANALYZE_VIDEO_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_backfill(call: ServiceCall) -> None:
+        """Handle the backfill service call."""
+        await _async_backfill(hass, call)
+
+    async def async_cancel_backfill(call: ServiceCall) -> None:
+        """Handle the cancel_backfill service call."""
+        await _get_entry_data(hass, call.data[ATTR_CAMERA])["backfill"].async_cancel()
+
+    async def async_get_analysis(call: ServiceCall) -> ServiceResponse:
+        """Handle the get_analysis service call."""
+        return _get_analysis(hass, call)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BACKFILL, async_backfill, schema=SERVICE_BACKFILL_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CANCEL_BACKFILL,
+        async_cancel_backfill,
+        schema=SERVICE_CANCEL_BACKFILL_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_ANALYSIS,
+        async_get_analysis,
+        schema=SERVICE_GET_ANALYSIS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
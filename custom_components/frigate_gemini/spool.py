@@ -0,0 +1,209 @@
+"""Shared on-disk spool for downloaded clips."""
+from __future__ import annotations
+
+import asyncio
+import glob
+import logging
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from collections import OrderedDict
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+TMPFS_DIR = "/dev/shm"
+SPOOL_SUBDIR = "frigem_spool"
+LEGACY_TEMP_PATTERN = "frigem_*"  # Per-entry mkdtemp dirs of older versions
+SPOOL_FILE_PATTERN = re.compile(r"^.+-[0-9a-f]{32}\.mp4$")  # Names from _new_path
+
+
+class SpoolEntry:
+    """A clip held in the spool, or reserved while it downloads."""
+
+    def __init__(self, key: str, path: str, size: int) -> None:
+        """Initialize the entry."""
+        self.key = key
+        self.path = path
+        self.size = size
+        self.pins = 0
+        self.committed = False
+        self.settled = asyncio.Event()  # Set once committed or discarded
+
+
+class ClipSpool:
+    """Store clips under a byte budget with LRU eviction.
+
+    Clips stay in the spool after use so later jobs for the same key can
+    reuse them. When the budget is full, unpinned clips are evicted oldest
+    first and new reservations wait until enough space is released.
+    """
+
+    def __init__(self, hass: HomeAssistant, location: str | None, budget: int) -> None:
+        """Initialize the spool."""
+        self.hass = hass
+        if location == "tmpfs":
+            location = TMPFS_DIR
+        # Always a dedicated subdirectory, so the sweep never touches user files
+        self.directory = os.path.join(location or tempfile.gettempdir(), SPOOL_SUBDIR)
+        self.budget = budget
+        self._entries: OrderedDict[str, SpoolEntry] = OrderedDict()
+        self._condition = asyncio.Condition()
+
+    @property
+    def used(self) -> int:
+        """Return the bytes currently held or reserved."""
+        return sum(entry.size for entry in self._entries.values())
+
+    @property
+    def typical_size(self) -> int:
+        """Return the average size of the clips held, as a reservation hint."""
+        sizes = [entry.size for entry in self._entries.values() if entry.committed]
+        return sum(sizes) // len(sizes) if sizes else 0
+
+    async def async_setup(self) -> None:
+        """Create the spool directory and remove leftovers of earlier runs."""
+        removed = await self.hass.async_add_executor_job(self._sweep)
+        _LOGGER.debug(
+            "[SPOOL] Using %s with a budget of %d bytes (%d orphans removed)",
+            self.directory,
+            self.budget,
+            removed,
+        )
+
+    def _sweep(self) -> int:
+        """Remove orphaned clips; runs in the executor."""
+        os.makedirs(self.directory, exist_ok=True)
+        removed = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if SPOOL_FILE_PATTERN.match(name) and os.path.isfile(path):
+                os.remove(path)
+                removed += 1
+        for legacy_dir in glob.glob(os.path.join(tempfile.gettempdir(), LEGACY_TEMP_PATTERN)):
+            if os.path.isdir(legacy_dir) and legacy_dir != self.directory:
+                shutil.rmtree(legacy_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def _new_path(self, key: str) -> str:
+        """Return a unique file name for a key."""
+        safe_key = re.sub(r"[^A-Za-z0-9._-]", "_", key)[-64:]
+        return os.path.join(self.directory, f"{safe_key}-{uuid.uuid4().hex}.mp4")
+
+    def _evict(self, needed: int) -> list[str]:
+        """Drop unpinned clips, least recently used first, to free bytes."""
+        evicted = []
+        used = self.used
+        for key, entry in list(self._entries.items()):
+            if used + needed <= self.budget:
+                break
+            if entry.pins:
+                continue
+            del self._entries[key]
+            used -= entry.size
+            evicted.append(entry.path)
+        return evicted
+
+    def _fits(self, needed: int) -> bool:
+        """Return True if needed bytes can be reserved after evicting."""
+        pinned = sum(entry.size for entry in self._entries.values() if entry.pins)
+        if pinned + needed <= self.budget:
+            return True
+        # A clip larger than the whole budget may still run on its own
+        return not pinned
+
+    async def _async_remove_files(self, paths: list[str]) -> None:
+        """Delete spool files in the executor."""
+        if not paths:
+            return
+
+        def _remove() -> None:
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+        await self.hass.async_add_executor_job(_remove)
+        _LOGGER.debug("[SPOOL] Evicted %d clips", len(paths))
+
+    async def async_checkout(self, key: str) -> str | None:
+        """Pin and return a cached clip for key, if present.
+
+        If the clip is still downloading, wait for it; returns None if that
+        download fails.
+        """
+        async with self._condition:
+            if (entry := self._entries.get(key)) is None:
+                return None
+        if not entry.committed:
+            await entry.settled.wait()
+        async with self._condition:
+            if not entry.committed or self._entries.get(entry.key) is not entry:
+                return None
+            entry.pins += 1
+            self._entries.move_to_end(entry.key)
+            return entry.path
+
+    async def async_reserve(self, key: str, size_hint: int = 0) -> str:
+        """Reserve space for a new clip, waiting while the spool is full."""
+        evicted = []
+        async with self._condition:
+            if (old := self._entries.pop(key, None)) is not None and old.pins:
+                # Another job still uses the old copy; keep it under a new key
+                old.key = f"{key}#{uuid.uuid4().hex}"
+                self._entries[old.key] = old
+            elif old is not None:
+                evicted.append(old.path)
+
+            if not self._fits(size_hint):
+                _LOGGER.debug(
+                    "[SPOOL] Budget full (%d/%d bytes), waiting to store %s",
+                    self.used,
+                    self.budget,
+                    key,
+                )
+                await self._condition.wait_for(lambda: self._fits(size_hint))
+            evicted += self._evict(size_hint)
+
+            entry = SpoolEntry(key, self._new_path(key), size_hint)
+            entry.pins = 1
+            self._entries[key] = entry
+
+        await self._async_remove_files(evicted)
+        return entry.path
+
+    def _find(self, path: str) -> SpoolEntry | None:
+        """Return the entry of a path handed out by the spool."""
+        return next(
+            (entry for entry in self._entries.values() if entry.path == path), None
+        )
+
+    async def async_commit(self, path: str, size: int) -> None:
+        """Record the final size of a reserved clip and make it available."""
+        async with self._condition:
+            if (entry := self._find(path)) is not None:
+                entry.size = size
+                entry.committed = True
+                entry.settled.set()
+            evicted = self._evict(0)
+        await self._async_remove_files(evicted)
+
+    async def async_release(self, path: str, discard: bool = False) -> None:
+        """Unpin a clip; discard removes it immediately."""
+        async with self._condition:
+            if (entry := self._find(path)) is not None:
+                entry.pins = max(0, entry.pins - 1)
+                if discard or not entry.committed or ("#" in entry.key and not entry.pins):
+                    del self._entries[entry.key]
+                    entry.settled.set()  # Jobs waiting on a failed download give up
+                    discard = True
+                else:
+                    self._entries.move_to_end(entry.key)
+            self._condition.notify_all()
+        if discard:
+            await self._async_remove_files([path])
@@ -0,0 +1,244 @@
+"""Per-event trace spans and event loop stall detection."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import LOOP_STALL_HISTORY, TRACE_BUFFER_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(__file__)
+
+_current_trace: ContextVar[Trace | None] = ContextVar("frigem_trace", default=None)
+
+
+class Trace:
+    """Timed spans of the stages one event went through."""
+
+    def __init__(self, camera: str, label: str, event_id: str | None) -> None:
+        """Start the trace."""
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.camera = camera
+        self.label = label
+        self.event_id = event_id
+        self.status = "ok"
+        self.spans: list[dict[str, Any]] = []
+        self._started = dt_util.utcnow()
+        self._start = time.perf_counter()
+        self._duration: float | None = None
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[dict[str, Any]]:
+        """Time a stage; the yielded record takes extra attributes."""
+        start = time.perf_counter()
+        record: dict[str, Any] = {"name": name, "start": round(start - self._start, 3)}
+        try:
+            yield record
+        except BaseException as err:
+            record["error"] = type(err).__name__
+            raise
+        finally:
+            record["duration"] = round(time.perf_counter() - start, 3)
+            self.spans.append(record)
+
+    def finish(self) -> None:
+        """Stop the trace clock."""
+        self._duration = round(time.perf_counter() - self._start, 3)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the trace as plain data."""
+        return {
+            "trace_id": self.trace_id,
+            "camera": self.camera,
+            "label": self.label,
+            "event_id": self.event_id,
+            "started": self._started.isoformat(),
+            "duration": self._duration,
+            "status": self.status,
+            "spans": sorted(self.spans, key=lambda span: span["start"]),
+        }
+
+
+@contextmanager
+def span(name: str) -> Iterator[dict[str, Any]]:
+    """Time a stage of the current task's trace; a no-op outside a trace."""
+    if (trace := _current_trace.get()) is None:
+        yield {}
+        return
+    with trace.span(name) as record:
+        yield record
+
+
+@contextmanager
+def detached_trace(
+    camera: str = "", label: str = "", event_id: str | None = None
+) -> Iterator[Trace]:
+    """Collect spans outside a TraceRecorder, e.g. in the analysis worker."""
+    trace = Trace(camera, label, event_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+
+
+class TraceRecorder:
+    """Keep recent traces in a ring buffer, optionally appending them to a file."""
+
+    def __init__(self, hass: HomeAssistant, path: str | None = None) -> None:
+        """Initialize the recorder."""
+        self.hass = hass
+        self.path = path
+        self._traces: deque[dict[str, Any]] = deque(maxlen=TRACE_BUFFER_SIZE)
+
+    @contextmanager
+    def trace(
+        self, camera: str, label: str, event_id: str | None
+    ) -> Iterator[Trace]:
+        """Trace the current task until the block exits."""
+        trace = Trace(camera, label, event_id)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        except BaseException as err:
+            trace.status = (
+                "cancelled" if isinstance(err, asyncio.CancelledError) else "error"
+            )
+            raise
+        finally:
+            _current_trace.reset(token)
+            trace.finish()
+            self._record(trace.as_dict())
+
+    @callback
+    def _record(self, data: dict[str, Any]) -> None:
+        """Store a finished trace."""
+        self._traces.append(data)
+        _LOGGER.debug("[TRACE] %s", data)
+        if self.path:
+            self.hass.async_add_executor_job(self._append, json.dumps(data))
+
+    def _append(self, line: str) -> None:
+        """Append one trace to the JSON-lines file; runs in the executor."""
+        try:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+        except OSError as err:
+            _LOGGER.warning("[TRACE] Could not write %s: %s", self.path, str(err))
+
+    def as_list(self, cameras: list[str] | None = None) -> list[dict[str, Any]]:
+        """Return recent traces, optionally only those of some cameras."""
+        return [
+            trace
+            for trace in self._traces
+            if cameras is None or trace["camera"] in cameras
+        ]
+
+
+class LoopWatchdog:
+    """Report when FriGem code blocks the event loop.
+
+    A callback on the loop records a heartbeat; a watcher thread captures the
+    loop thread's stack when the heartbeat is late by more than the
+    threshold. Only stalls with FriGem code on the stack are reported.
+    """
+
+    def __init__(self, hass: HomeAssistant, threshold: float) -> None:
+        """Initialize the watchdog."""
+        self.hass = hass
+        self.threshold = threshold
+        self._interval = threshold / 2
+        self._beat = time.monotonic()
+        self._reported_beat = 0.0
+        self._loop_thread: int | None = None
+        self._timer = None
+        self._stop = threading.Event()
+        self.other_stalls = 0
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=LOOP_STALL_HISTORY)
+
+    @callback
+    def async_start(self) -> None:
+        """Start the heartbeat and the watcher thread."""
+        self._loop_thread = threading.get_ident()
+        self._async_heartbeat()
+        threading.Thread(
+            target=self._watch, name="frigem_loop_watchdog", daemon=True
+        ).start()
+        _LOGGER.info(
+            "[WATCHDOG] Reporting event loop stalls over %.0f ms", self.threshold * 1000
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop watching."""
+        self._stop.set()
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    @callback
+    def _async_heartbeat(self) -> None:
+        """Record that the loop is responsive."""
+        now = time.monotonic()
+        if self.stalls and self.stalls[-1]["_beat"] == self._beat:
+            # The stall reported for the previous beat is over; record its length
+            self.stalls[-1]["duration"] = round(now - self._beat - self._interval, 3)
+        self._beat = now
+        self._timer = self.hass.loop.call_later(self._interval, self._async_heartbeat)
+
+    def _watch(self) -> None:
+        """Check the heartbeat; runs in its own thread."""
+        while not self._stop.wait(self._interval / 2):
+            beat = self._beat
+            late = time.monotonic() - beat - self._interval
+            if late < self.threshold or beat == self._reported_beat:
+                continue
+            self._reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread)  # pylint: disable=protected-access
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            if not any(entry.filename.startswith(PACKAGE_DIR) for entry in stack):
+                self.other_stalls += 1
+                continue
+            formatted = "".join(traceback.format_list(stack))
+            self.stalls.append(
+                {
+                    "_beat": beat,
+                    "time": dt_util.utcnow().isoformat(),
+                    "duration": round(late, 3),
+                    "stack": formatted,
+                }
+            )
+            _LOGGER.warning(
+                "[WATCHDOG] FriGem blocked the event loop for over %.0f ms:\n%s",
+                late * 1000,
+                formatted,
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the recorded stalls."""
+        return {
+            "threshold": self.threshold,
+            "other_stalls": self.other_stalls,
+            "stalls": [
+                {key: value for key, value in stall.items() if key != "_beat"}
+                for stall in self.stalls
+            ],
+        }
@@ -0,0 +1,38 @@
+"""Helpers for the FriGem integration."""
+from __future__ import annotations
+
+
+def parse_label_map(text: str | None) -> dict[str, str]:
+    """Parse "label=value" pairs separated by commas or new lines."""
+    result: dict[str, str] = {}
+    for item in (text or "").replace("\n", ",").split(","):
+        if not item.strip():
+            continue
+        label, sep, value = item.partition("=")
+        if not sep or not label.strip() or not value.strip():
+            raise ValueError(f"Invalid entry '{item.strip()}', expected label=value")
+        result[label.strip()] = value.strip()
+    return result
+
+
+def parse_label_weights(text: str | None) -> dict[str, float]:
+    """Parse "label=weight" pairs into positive numbers."""
+    result: dict[str, float] = {}
+    for label, value in parse_label_map(text).items():
+        try:
+            weight = float(value)
+        except ValueError as err:
+            raise ValueError(f"Invalid weight '{value}' for {label}") from err
+        if weight <= 0:
+            raise ValueError(f"Weight for {label} must be positive")
+        result[label] = weight
+    return result
+
+
+def parse_api_keys(api_key: str, extra_keys: str | None) -> list[str]:
+    """Return the primary API key followed by any extra keys, without duplicates."""
+    keys = [api_key.strip()]
+    for key in (extra_keys or "").replace(",", " ").split():
+        if key not in keys:
+            keys.append(key)
+    return keys
@@ -0,0 +1,210 @@
+"""Out-of-process analysis worker.
+
+Runs the Gemini upload and generate steps in a separate process, so bursts
+of analyses don't compete with Home Assistant's event loop and a crash or
+stall of the SDK can't take Home Assistant down with it. The integration
+spawns it when `spawn_worker` is set; otherwise start it from the Home
+Assistant configuration directory with
+
+    python -m custom_components.frigate_gemini.worker --socket PATH
+
+Running it as a module imports the integration package, and with it Home
+Assistant, so it needs Home Assistant's Python environment. It isolates the
+SDK from Home Assistant's event loop; it doesn't save memory.
+
+The protocol is one JSON object per line in each direction. Requests carry
+an `id` and an `op`; replies echo the `id` with `ok` and either the payload
+or an `error`:
+
+    {"id": 1, "op": "configure", "profile": "<entry>", "settings": {...}}
+    {"id": 2, "op": "analyze", "profile": "<entry>", "label": "person",
+     "prompt": "...", "videos": ["/config/.frigem_spool/abc.mp4"]}
+    {"id": 2, "ok": true, "result": {"text": "...", ...}, "spans": [...]}
+
+Clips are passed as paths, so the worker must share the clip spool's
+filesystem with Home Assistant.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import signal
+import stat
+from dataclasses import asdict
+from typing import Any
+
+from .const import WORKER_PING_INTERVAL, WORKER_STREAM_LIMIT
+from .gemini_handler import GeminiHandler
+from .tracing import detached_trace
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AnalysisWorker:
+    """Serve analysis requests from the integration over a Unix socket."""
+
+    def __init__(self) -> None:
+        """Initialize the worker."""
+        self._handlers: dict[str, GeminiHandler] = {}
+        self.running = 0
+
+    def _handler(self, request: dict[str, Any]) -> GeminiHandler:
+        """Return the handler of the request's profile."""
+        try:
+            return self._handlers[request["profile"]]
+        except KeyError as err:
+            raise ValueError(f"Unknown profile {request.get('profile')}") from err
+
+    async def _configure(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Create (or replace) the Gemini handler of a config entry."""
+        old = self._handlers.get(request["profile"])
+        # Assigned before any await, so analyses sent right after use it
+        self._handlers[request["profile"]] = GeminiHandler(**request["settings"])
+        if old:
+            await old.close()
+        _LOGGER.info("[WORKER] Configured profile %s", request["profile"])
+        return {}
+
+    async def _release(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Drop the Gemini handler of an unloaded config entry."""
+        if handler := self._handlers.pop(request["profile"], None):
+            await handler.close()
+        return {}
+
+    async def _prepare(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Load the SDK and clients ahead of the first analysis."""
+        await self._handler(request).async_prepare()
+        return {}
+
+    async def _analyze(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Analyze clips or a snapshot."""
+        handler = self._handler(request)
+        prompt = request.get("prompt")
+        label = request["label"]
+        self.running += 1
+        try:
+            with detached_trace(label=label) as trace:
+                if image := request.get("image"):
+                    result = await handler.analyze_image(
+                        base64.b64decode(image), prompt, label
+                    )
+                else:
+                    result = await handler.analyze_videos(
+                        request["videos"], prompt, label
+                    )
+        finally:
+            self.running -= 1
+        return {"result": asdict(result), "spans": trace.as_dict()["spans"]}
+
+    async def _stats(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Return the counters of a profile's Gemini handler."""
+        return {"stats": await self._handler(request).async_diagnostics()}
+
+    async def _ping(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Answer a liveness check."""
+        return {"running": self.running}
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve one connection; requests run concurrently."""
+        operations = {
+            "configure": self._configure,
+            "release": self._release,
+            "prepare": self._prepare,
+            "analyze": self._analyze,
+            "stats": self._stats,
+            "ping": self._ping,
+        }
+        tasks: set[asyncio.Task] = set()
+
+        async def _respond(request: dict[str, Any]) -> None:
+            try:
+                payload = await operations[request["op"]](request)
+                reply = {"id": request.get("id"), "ok": True, **payload}
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.warning("[WORKER] %s failed: %s", request.get("op"), str(err))
+                reply = {"id": request.get("id"), "ok": False, "error": str(err)}
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+
+        _LOGGER.info("[WORKER] Integration connected")
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(_respond(json.loads(line)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, ValueError) as err:
+            _LOGGER.warning("[WORKER] Dropping connection: %s", str(err))
+        finally:
+            # Nobody is left to receive the results
+            for task in tasks:
+                task.cancel()
+            writer.close()
+            _LOGGER.info("[WORKER] Integration disconnected")
+
+    async def _watch_parent(self, stop: asyncio.Event) -> None:
+        """Exit when the Home Assistant process that spawned us is gone."""
+        parent = os.getppid()
+        while not stop.is_set():
+            await asyncio.sleep(WORKER_PING_INTERVAL)
+            if os.getppid() != parent:
+                _LOGGER.warning("[WORKER] Home Assistant exited, stopping")
+                stop.set()
+
+    async def serve(self, socket_path: str, exit_with_parent: bool = False) -> None:
+        """Listen on the socket until stopped."""
+        if os.path.lexists(socket_path):
+            if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+                raise SystemExit(f"{socket_path} exists and is not a socket")
+            os.unlink(socket_path)  # Left behind by a worker that crashed
+        # Created owner-only, so nobody else can connect before we could chmod
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(
+                self._handle_client, socket_path, limit=WORKER_STREAM_LIMIT
+            )
+        finally:
+            os.umask(umask)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        if exit_with_parent:
+            asyncio.create_task(self._watch_parent(stop))
+
+        _LOGGER.info("[WORKER] Listening on %s (pid %d)", socket_path, os.getpid())
+        async with server:
+            await stop.wait()
+        for handler in self._handlers.values():
+            await handler.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main() -> None:
+    """Run the worker from the command line."""
+    parser = argparse.ArgumentParser(description="FriGem analysis worker")
+    parser.add_argument("--socket", required=True, help="Unix socket to listen on")
+    parser.add_argument(
+        "--exit-with-parent",
+        action="store_true",
+        help="Stop when the spawning process exits",
+    )
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(levelname)s (frigem worker) %(message)s",
+    )
+    asyncio.run(AnalysisWorker().serve(args.socket, args.exit_with_parent))
+
+
+if __name__ == "__main__":
+    main()
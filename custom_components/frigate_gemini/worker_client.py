@@ -0,0 +1,319 @@
+"""Integration side of the out-of-process analysis worker."""
+from __future__ import annotations
+
+import asyncio
+import base64
+import itertools
+import json
+import logging
+import sys
+from contextlib import suppress
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    WORKER_CONNECT_TIMEOUT,
+    WORKER_MODULE,
+    WORKER_PING_INTERVAL,
+    WORKER_PING_TIMEOUT,
+    WORKER_RESTART_DELAY,
+    WORKER_STOP_TIMEOUT,
+    WORKER_STREAM_LIMIT,
+)
+from .gemini_handler import AnalysisResult, GeminiAPIError
+from .tracing import span
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WorkerClient:
+    """Connection to the analysis worker.
+
+    Requests are multiplexed over one Unix socket. The worker is pinged
+    regularly; if it stops answering or the connection drops, waiting
+    requests fail and a spawned worker is killed and started again, while
+    Home Assistant's own loop is unaffected.
+    """
+
+    def __init__(self, hass: HomeAssistant, socket_path: str, spawn: bool) -> None:
+        """Initialize the client."""
+        self.hass = hass
+        self.socket_path = socket_path
+        self.spawn = spawn
+        self._profiles: dict[str, dict[str, Any]] = {}
+        self._requests: dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._writer: asyncio.StreamWriter | None = None
+        self._connected = asyncio.Event()
+        self._process: asyncio.subprocess.Process | None = None
+        self._task: asyncio.Task | None = None
+        self.restarts = 0
+        self.stalls = 0
+        self.disconnects = 0
+
+    @callback
+    def async_start(self) -> None:
+        """Start connecting (and spawning the worker if configured)."""
+        self._task = self.hass.async_create_background_task(
+            self._async_run(), "frigem_worker"
+        )
+
+    async def async_stop(self) -> None:
+        """Disconnect and stop a spawned worker."""
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._process and self._process.returncode is None:
+            self._process.terminate()
+            try:
+                await asyncio.wait_for(self._process.wait(), WORKER_STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._process.kill()
+
+    async def _async_spawn(self) -> None:
+        """Start the worker process."""
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            WORKER_MODULE,
+            "--socket",
+            self.socket_path,
+            "--exit-with-parent",
+            cwd=self.hass.config.config_dir,
+        )
+        _LOGGER.info("[WORKER] Started analysis worker (pid %d)", self._process.pid)
+
+    async def _async_connect(
+        self,
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Connect to the worker, (re)starting it first if it is ours and gone."""
+        while True:
+            if self.spawn and (
+                self._process is None or self._process.returncode is not None
+            ):
+                if self._process is not None:
+                    self.restarts += 1
+                    _LOGGER.warning(
+                        "[WORKER] Analysis worker exited with code %s, restarting",
+                        self._process.returncode,
+                    )
+                await self._async_spawn()
+            try:
+                return await asyncio.open_unix_connection(
+                    self.socket_path, limit=WORKER_STREAM_LIMIT
+                )
+            except OSError as err:
+                _LOGGER.debug(
+                    "[WORKER] Could not connect to %s: %s", self.socket_path, str(err)
+                )
+                await asyncio.sleep(WORKER_RESTART_DELAY)
+
+    async def _async_run(self) -> None:
+        """Keep a connection to the worker for as long as the integration runs."""
+        while True:
+            reader, writer = await self._async_connect()
+            self._writer = writer
+            reading = asyncio.create_task(self._async_read(reader))
+            try:
+                # Profiles are configured before any queued analysis is sent
+                await self._async_configure_all()
+                self._connected.set()
+                _LOGGER.info("[WORKER] Connected to analysis worker at %s", self.socket_path)
+                await self._async_watch(reading)
+            except GeminiAPIError as err:
+                _LOGGER.warning("[WORKER] Analysis worker failed: %s", str(err))
+            finally:
+                self._connected.clear()
+                self._writer = None
+                reading.cancel()
+                writer.close()
+                self._fail_pending("Connection to the analysis worker was lost")
+            self.disconnects += 1
+            await asyncio.sleep(WORKER_RESTART_DELAY)
+
+    async def _async_watch(self, reading: asyncio.Task) -> None:
+        """Ping the worker until the connection drops or the worker stalls."""
+        while True:
+            done, _ = await asyncio.wait({reading}, timeout=WORKER_PING_INTERVAL)
+            if done:
+                return
+            try:
+                await asyncio.wait_for(self._async_send("ping"), WORKER_PING_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.stalls += 1
+                _LOGGER.warning(
+                    "[WORKER] Analysis worker did not answer for %ss", WORKER_PING_TIMEOUT
+                )
+                if self._process and self._process.returncode is None:
+                    self._process.kill()
+                    await self._process.wait()
+                return
+
+    async def _async_read(self, reader: asyncio.StreamReader) -> None:
+        """Hand replies to the requests waiting for them."""
+        try:
+            while line := await reader.readline():
+                reply = json.loads(line)
+                future = self._requests.pop(reply.get("id"), None)
+                if future and not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, ValueError) as err:
+            _LOGGER.warning("[WORKER] Bad reply from analysis worker: %s", str(err))
+        finally:
+            self._fail_pending("Connection to the analysis worker was lost")
+
+    @callback
+    def _fail_pending(self, message: str) -> None:
+        """Fail every request still waiting for a reply."""
+        for future in self._requests.values():
+            if not future.done():
+                future.set_exception(GeminiAPIError(message))
+        self._requests.clear()
+
+    async def _async_send(self, op: str, **data: Any) -> dict[str, Any]:
+        """Send a request on the current connection and wait for its reply."""
+        if self._writer is None:
+            raise GeminiAPIError("Analysis worker is not connected")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._requests[request_id] = future
+        try:
+            self._writer.write(
+                json.dumps({"id": request_id, "op": op, **data}).encode() + b"\n"
+            )
+            await self._writer.drain()
+            reply = await future
+        except ConnectionError as err:
+            raise GeminiAPIError(f"Analysis worker connection failed: {err}") from err
+        finally:
+            self._requests.pop(request_id, None)
+        if not reply.get("ok"):
+            raise GeminiAPIError(reply.get("error") or "Analysis worker error")
+        return reply
+
+    async def _async_configure(self, profile: str, settings: dict[str, Any]) -> None:
+        """Send a config entry's Gemini settings to the worker."""
+        try:
+            await self._async_send("configure", profile=profile, settings=settings)
+        except GeminiAPIError as err:
+            _LOGGER.error("[WORKER] Could not configure %s: %s", profile, str(err))
+
+    async def _async_configure_all(self) -> None:
+        """Configure every profile on a new connection.
+
+        Entries set up or unloaded while this runs aren't sent by
+        async_add_profile or async_remove_profile yet, so the profiles are
+        compared again until nothing has changed.
+        """
+        sent: dict[str, dict[str, Any]] = {}
+        while True:
+            changed = [
+                (profile, settings)
+                for profile, settings in self._profiles.items()
+                if sent.get(profile) is not settings
+            ]
+            removed = [profile for profile in sent if profile not in self._profiles]
+            if not changed and not removed:
+                return
+            for profile, settings in changed:
+                await self._async_configure(profile, settings)
+                sent[profile] = settings
+            for profile in removed:
+                with suppress(GeminiAPIError):
+                    await self._async_send("release", profile=profile)
+                del sent[profile]
+
+    async def async_request(self, op: str, **data: Any) -> dict[str, Any]:
+        """Send a request once the worker is connected."""
+        try:
+            await asyncio.wait_for(self._connected.wait(), WORKER_CONNECT_TIMEOUT)
+        except asyncio.TimeoutError as err:
+            raise GeminiAPIError("Analysis worker is not available") from err
+        return await self._async_send(op, **data)
+
+    @callback
+    def async_add_profile(self, profile: str, settings: dict[str, Any]) -> None:
+        """Register a config entry's Gemini settings with the worker."""
+        self._profiles[profile] = settings
+        if self._connected.is_set():
+            self.hass.async_create_task(self._async_configure(profile, settings))
+
+    async def async_remove_profile(self, profile: str) -> None:
+        """Forget a config entry's settings."""
+        self._profiles.pop(profile, None)
+        if self._connected.is_set():
+            with suppress(GeminiAPIError):
+                await self._async_send("release", profile=profile)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the connection."""
+        return {
+            "socket": self.socket_path,
+            "spawned": self.spawn,
+            "pid": self._process.pid if self._process else None,
+            "connected": self._connected.is_set(),
+            "pending": len(self._requests),
+            "restarts": self.restarts,
+            "stalls": self.stalls,
+            "disconnects": self.disconnects,
+        }
+
+
+class RemoteGeminiHandler:
+    """Stand-in for GeminiHandler that runs analyses in the worker."""
+
+    def __init__(
+        self, worker: WorkerClient, profile: str, settings: dict[str, Any]
+    ) -> None:
+        """Register the settings with the worker."""
+        self.worker = worker
+        self.profile = profile
+        worker.async_add_profile(profile, settings)
+
+    async def async_prepare(self) -> None:
+        """Have the worker load the SDK ahead of the first analysis."""
+        await self.worker.async_request("prepare", profile=self.profile)
+
+    async def _analyze(self, prompt: str | None, label: str, **data: Any) -> AnalysisResult:
+        """Run an analysis in the worker."""
+        with span("worker") as record:
+            reply = await self.worker.async_request(
+                "analyze", profile=self.profile, prompt=prompt, label=label, **data
+            )
+            record["spans"] = reply.get("spans")
+        return AnalysisResult(**reply["result"])
+
+    async def analyze_video(
+        self, video_path: str, prompt: str | None, label: str
+    ) -> AnalysisResult:
+        """Analyze a video in the worker."""
+        return await self._analyze(prompt, label, videos=[video_path])
+
+    async def analyze_videos(
+        self, video_paths: list[str], prompt: str | None, label: str
+    ) -> AnalysisResult:
+        """Analyze several clips of the same event in the worker."""
+        return await self._analyze(prompt, label, videos=video_paths)
+
+    async def analyze_image(
+        self, image: bytes, prompt: str | None, label: str
+    ) -> AnalysisResult:
+        """Analyze a single snapshot in the worker."""
+        return await self._analyze(
+            prompt, label, image=base64.b64encode(image).decode()
+        )
+
+    async def async_diagnostics(self) -> dict[str, Any]:
+        """Return the worker's model, API key and SDK counters."""
+        try:
+            reply = await self.worker.async_request("stats", profile=self.profile)
+        except GeminiAPIError as err:
+            return {"worker_error": str(err)}
+        return reply["stats"]
+
+    async def close(self) -> None:
+        """Release the settings in the worker."""
+        await self.worker.async_remove_profile(self.profile)
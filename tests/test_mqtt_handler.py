@@ -0,0 +1,67 @@
+"""Tests for publishing camera group results."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("aiofiles")
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.frigate_gemini.correlation import (  # noqa: E402
+    CorrelatedEvent,
+    EventGroup,
+)
+from custom_components.frigate_gemini.gemini_handler import AnalysisResult  # noqa: E402
+from custom_components.frigate_gemini.mqtt_handler import MQTTHandler  # noqa: E402
+from custom_components.frigate_gemini.pipeline import (  # noqa: E402
+    AnalysisJob,
+    AnalysisPipeline,
+)
+
+
+def test_group_name_with_spaces_gives_valid_entity_id(tmp_path: Path) -> None:
+    """A free-text group name is slugified into the group sensor's entity ID."""
+
+    async def _publish() -> tuple:
+        hass = HomeAssistant(str(tmp_path))
+        handler = MQTTHandler(
+            hass,
+            "http://frigate",
+            "frigate/events",
+            ["front_door"],
+            "What is the {label} doing?",
+            None,
+            AnalysisPipeline(),
+            None,
+        )
+        group = EventGroup("Front Yard-Cams", "person", 30)
+        group.members.append(
+            CorrelatedEvent(
+                handler,
+                AnalysisJob("front_door", "person", "1700000000.1-abc", confidence=0.9),
+            )
+        )
+        fired = []
+        hass.bus.async_listen("frigate_gemini_analysis_complete", fired.append)
+
+        handler._publish_group(  # pylint: disable=protected-access
+            group, AnalysisResult("A person walks up", "gemini-2.0-flash", 1.0), "trace"
+        )
+        await hass.async_block_till_done()
+        states = (
+            hass.states.get("sensor.frigem_group_front_yard_cams"),
+            hass.states.get("sensor.frigem_front_door"),
+        )
+        await hass.async_stop(force=True)
+        return states, fired
+
+    (group_state, camera_state), fired = asyncio.run(_publish())
+
+    assert group_state is not None
+    assert group_state.attributes["group"] == "Front Yard-Cams-1700000000.1-abc"
+    assert camera_state is not None
+    assert len(fired) == 1
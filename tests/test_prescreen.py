@@ -0,0 +1,92 @@
+"""Tests for the clip pre-screening hash."""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+av = pytest.importorskip("av")
+
+MODULE = (
+    Path(__file__).parent.parent / "custom_components" / "frigate_gemini" / "prescreen.py"
+)
+# prescreen only needs the standard library at import time, so it is loaded
+# directly instead of through the integration package
+_spec = importlib.util.spec_from_file_location("prescreen", MODULE)
+prescreen = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(prescreen)
+
+DEDUP_DISTANCE = 6  # DEFAULT_DEDUP_DISTANCE
+WIDTH, HEIGHT, FRAMES = 320, 180, 30
+
+
+def _background() -> np.ndarray:
+    """Return a textured backdrop shared by every clip."""
+    rng = np.random.default_rng(1)
+    tiles = rng.integers(40, 200, size=(HEIGHT // 20, WIDTH // 20), dtype=np.uint8)
+    return np.kron(tiles, np.ones((20, 20), dtype=np.uint8))
+
+
+def _write_clip(path: Path, draw) -> str:
+    """Encode a clip of the backdrop with draw(frame, index) painted on it."""
+    background = _background()
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream("mpeg4", rate=10)
+        stream.width, stream.height, stream.pix_fmt = WIDTH, HEIGHT, "yuv420p"
+        for index in range(FRAMES):
+            frame = np.repeat(background[:, :, None], 3, axis=2)
+            draw(frame, index)
+            for packet in stream.encode(av.VideoFrame.from_ndarray(frame, format="rgb24")):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return str(path)
+
+
+def _person(frame: np.ndarray, index: int) -> None:
+    """A tall bright figure walking left to right near the bottom."""
+    x = 20 + index * 6
+    frame[100:170, x : x + 24] = 250
+    frame[100:118, x + 6 : x + 18] = 30
+
+
+def _car(frame: np.ndarray, index: int) -> None:
+    """A wide dark shape crossing right to left near the top."""
+    x = 260 - index * 7
+    frame[20:60, max(0, x) : max(0, x + 70)] = 10
+    frame[30:40, max(0, x + 10) : max(0, x + 60)] = 220
+
+
+def _distance(first: str, second: str) -> int:
+    return (int(first, 16) ^ int(second, 16)).bit_count()
+
+
+def test_different_events_on_same_background_differ(tmp_path: Path) -> None:
+    """Two different subjects in front of one scene are not repeats."""
+    person = prescreen.inspect_clip(_write_clip(tmp_path / "person.mp4", _person))
+    car = prescreen.inspect_clip(_write_clip(tmp_path / "car.mp4", _car))
+
+    # The static scene alone can't tell them apart...
+    assert _distance(person["phash"][:16], car["phash"][:16]) <= DEDUP_DISTANCE
+    # ...the subject half can
+    assert _distance(person["phash"], car["phash"]) > DEDUP_DISTANCE
+
+
+def test_repeated_event_matches(tmp_path: Path) -> None:
+    """The same subject moving the same way again is a repeat."""
+    first = prescreen.inspect_clip(_write_clip(tmp_path / "first.mp4", _person))
+    second = prescreen.inspect_clip(_write_clip(tmp_path / "second.mp4", _person))
+
+    assert _distance(first["phash"], second["phash"]) <= DEDUP_DISTANCE
+
+
+def test_static_clip_has_empty_subject_hash(tmp_path: Path) -> None:
+    """Without motion only the scene contributes to the hash."""
+    scores = prescreen.inspect_clip(
+        _write_clip(tmp_path / "static.mp4", lambda frame, index: None)
+    )
+
+    assert scores["activity_score"] == 0
+    assert int(scores["phash"][16:], 16) == 0